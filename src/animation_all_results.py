@@ -5,7 +5,8 @@ import argparse
 import csv
 import ast
 from pathlib import Path
-from src.run_sokoban.sokoban import parse_map, SokobanState, precompute_dead_squares, Box
+from src.run_sokoban.sokoban import SokobanState
+from src.run_sokoban.compiled_level import compile_level
 
 class MultiAlgorithmAnimation:
     def __init__(self, master, sokoban_map, algorithm_results, mode):
@@ -27,9 +28,11 @@ class MultiAlgorithmAnimation:
         self.animation_states = {}
         for algo_name, result in algorithm_results.items():
             if result.get('solution'):
-                boxes_set = set(self.sokoban_map.boxes)
+                # El estado solo conoce celdas ocupadas; los ids de las cajas van aparte
+                box_positions = {box.id: box.pos for box in self.sokoban_map.boxes}
                 self.animation_states[algo_name] = {
-                    'state': SokobanState(self.sokoban_map.player, boxes_set),
+                    'state': SokobanState(self.sokoban_map.player, box_positions.values()),
+                    'box_positions': box_positions,
                     'solution': result['solution'],
                     'current_step': 0,
                     'info': result
@@ -151,7 +154,7 @@ class MultiAlgorithmAnimation:
         
         walls, floors, goals = self.sokoban_map.walls, self.sokoban_map.floors, self.sokoban_map.goals
         player = state.player
-        boxes = {box.pos for box in state.boxes}
+        boxes = state.boxes
         
         # Calcular dimensiones
         min_r = min(r for r, c in floors | walls)
@@ -229,8 +232,8 @@ class MultiAlgorithmAnimation:
         self.current_step = 0
         
         for algo_name, anim_data in self.animation_states.items():
-            boxes_set = set(self.sokoban_map.boxes)
-            anim_data['state'] = SokobanState(self.sokoban_map.player, boxes_set)
+            anim_data['box_positions'] = {box.id: box.pos for box in self.sokoban_map.boxes}
+            anim_data['state'] = SokobanState(self.sokoban_map.player, anim_data['box_positions'].values())
             anim_data['current_step'] = 0
         
         self.draw_all_maps()
@@ -267,13 +270,13 @@ class MultiAlgorithmAnimation:
         for algo_name, anim_data in self.animation_states.items():
             if anim_data['current_step'] < len(anim_data['solution']):
                 move = anim_data['solution'][anim_data['current_step']]
-                self.apply_move(anim_data['state'], move)
+                self.apply_move(anim_data, move)
                 anim_data['current_step'] += 1
         
         self.step_label.config(text=f"Paso: {self.current_step}")
     
-    def apply_move(self, state, move):
-        """Aplicar movimiento a un estado"""
+    def apply_move(self, anim_data, move):
+        """Aplicar movimiento al estado de una animación"""
         action, box_id = move
         direction_map = {
             'Up': (-1, 0),
@@ -286,18 +289,15 @@ class MultiAlgorithmAnimation:
             return
 
         dr, dc = direction_map[action]
+        state = anim_data['state']
         new_player_pos = (state.player[0] + dr, state.player[1] + dc)
 
-        boxes_set = set(state.boxes)
-
+        box_positions = anim_data['box_positions']
         if box_id is not None:
-            box_to_move = next(b for b in boxes_set if b.id == box_id)
-            new_box_pos = (box_to_move.pos[0] + dr, box_to_move.pos[1] + dc)
-            boxes_set.remove(box_to_move)
-            boxes_set.add(Box(box_to_move.id, new_box_pos))
-            
-        state.boxes = boxes_set
-        state.player = new_player_pos
+            box_pos = box_positions[box_id]
+            box_positions[box_id] = (box_pos[0] + dr, box_pos[1] + dc)
+
+        anim_data['state'] = SokobanState(new_player_pos, box_positions.values())
 
 def parse_solution_string(solution_str):
     """Parsear la cadena de solución en una lista de movimientos"""
@@ -398,7 +398,7 @@ def main():
     
     print("Cargando mapa...")
     try:
-        sokoban_map = parse_map(map_file)
+        sokoban_map = compile_level(map_file).source
     except Exception as e:
         print(f"Error al cargar el mapa: {e}")
         return
@@ -2,7 +2,7 @@ import os
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import time
-from src.run_sokoban.sokoban import parse_map, SokobanState, precompute_dead_squares, Box
+from src.run_sokoban.sokoban import parse_map, SokobanState, precompute_dead_squares
 from src.run_sokoban.search_algorithms.bfs import bfs
 from src.run_sokoban.search_algorithms.dfs import dfs
 from src.run_sokoban.search_algorithms.iddfs import iddfs
@@ -55,9 +55,9 @@ class AnimationWindow:
         
         # Initialize animation
         self.animation_id = None
-        # Convert frozenset to set for mutable operations
-        boxes_set = set(self.sokoban_map.boxes)
-        self.current_state = SokobanState(self.sokoban_map.player, boxes_set)
+        # The state only knows occupied cells; box ids are tracked on the side
+        self.box_positions = {box.id: box.pos for box in self.sokoban_map.boxes}
+        self.current_state = SokobanState(self.sokoban_map.player, self.box_positions.values())
         self.draw_map()
     
     def draw_map(self):
@@ -66,7 +66,7 @@ class AnimationWindow:
         walls, floors, goals = self.sokoban_map.walls, self.sokoban_map.floors, self.sokoban_map.goals
 
         player = self.current_state.player
-        boxes = {box.pos for box in self.current_state.boxes}
+        boxes = self.current_state.boxes
         # Calculate cell size based on map dimensions
         min_r = min(r for r, c in floors | walls)
         max_r = max(r for r, c in floors | walls)
@@ -128,9 +128,8 @@ class AnimationWindow:
     def reset_animation(self):
         self.pause_animation()
         self.current_step = 0
-        # Convert frozenset to set for mutable operations
-        boxes_set = set(self.sokoban_map.boxes)
-        self.current_state = SokobanState(self.sokoban_map.player, boxes_set)
+        self.box_positions = {box.id: box.pos for box in self.sokoban_map.boxes}
+        self.current_state = SokobanState(self.sokoban_map.player, self.box_positions.values())
         self.draw_map()
         self.step_label.config(text=f"Step: 0/{len(self.solution_moves)}")
     
@@ -157,13 +156,8 @@ class AnimationWindow:
         dr, dc = direction_map[action]
         new_player_pos = (self.current_state.player[0] + dr, self.current_state.player[1] + dc)
 
-        boxes_set = set(self.current_state.boxes)
-
         if box_id is not None:
-            box_to_move = next(b for b in boxes_set if b.id == box_id)
-            new_box_pos = (box_to_move.pos[0] + dr, box_to_move.pos[1] + dc)
-            boxes_set.remove(box_to_move)
-            boxes_set.add(Box(box_to_move.id, new_box_pos))
-            
-        self.current_state.boxes = boxes_set
-        self.current_state.player = new_player_pos
\ No newline at end of file
+            box_pos = self.box_positions[box_id]
+            self.box_positions[box_id] = (box_pos[0] + dr, box_pos[1] + dc)
+
+        self.current_state = SokobanState(new_player_pos, self.box_positions.values())
\ No newline at end of file
@@ -0,0 +1,67 @@
+import os
+import argparse
+from pathlib import Path
+
+from src.run_sokoban.compiled_level import compile_level, search_map
+from src.run_sokoban.sokoban import get_push_neighbors, get_neighbors
+from src.run_sokoban.bitboard import get_bitboard_push_neighbors, get_bitboard_neighbors
+from src.run_sokoban.search_algorithms.astar import astar
+from src.run_sokoban.search_algorithms.parallel_astar import parallel_astar
+from src.run_sokoban.search_algorithms.heuristics import manhattan_heuristic, heuristic_boxes_out, hungarian_heuristic
+
+MAPS_DIR = Path("src/maps")
+
+# Solo heurísticas admisibles: el benchmark también verifica que el costo sea el óptimo
+HEURISTICS = {
+    "manhattan": manhattan_heuristic,
+    "boxes_out": heuristic_boxes_out,
+    "hungarian": hungarian_heuristic
+}
+
+NEIGHBORS = {
+    ("set", "player"): get_neighbors,
+    ("set", "push"): get_push_neighbors,
+    ("bitboard", "player"): get_bitboard_neighbors,
+    ("bitboard", "push"): get_bitboard_push_neighbors
+}
+
+def run_benchmark(level_name, worker_counts, mode="push", engine="bitboard", heuristic_name="manhattan"):
+    # Sin aprender patrones: A* y cada corrida de PA* podan lo mismo y los nodos se comparan
+    level = compile_level(MAPS_DIR / f"{level_name}.txt", learn_patterns=False)
+    sokoban_map, initial_state = search_map(level, engine, mode)
+    heuristic = HEURISTICS[heuristic_name]
+    neighbor_finder = NEIGHBORS[(engine, mode)]
+
+    baseline = astar(initial_state, sokoban_map, heuristic, level.dead_squares, neighbor_finder)
+    print(f"\n=== A* paralelo en {level_name} ({mode}, {engine}, {heuristic_name}, {os.cpu_count()} núcleos) ===")
+    print(f"{'procesos':<10}{'tiempo (s)':>12}{'speedup':>10}{'nodos':>10}{'mensajes':>10}{'costo':>8}")
+    print(f"{'A*':<10}{baseline['time']:>12.3f}{'':>10}{baseline['nodes_expanded']:>10}{'':>10}{str(baseline['cost']):>8}")
+
+    results = []
+    reference = None
+    for workers in worker_counts:
+        result = parallel_astar(initial_state, sokoban_map, heuristic, level.dead_squares, neighbor_finder, workers=workers)
+        reference = reference or result["time"]
+        speedup = reference / result["time"] if result["time"] else float("inf")
+        flag = "" if result["cost"] == baseline["cost"] else "  ≠ A*"
+        print(f"{workers:<10}{result['time']:>12.3f}{speedup:>9.2f}x{result['nodes_expanded']:>10}"
+              f"{result['messages']:>10}{str(result['cost']):>8}{flag}")
+        results.append((workers, result))
+    return baseline, results
+
+def main():
+    """Mide el speedup del A* distribuido por hash contra la cantidad de procesos"""
+    parser = argparse.ArgumentParser(description="Benchmark de A* paralelo con 1/2/4/8 procesos")
+    parser.add_argument("levels", nargs="+", help="Niveles a medir (ej: level_16 level_60)")
+    parser.add_argument("--workers", "-w", type=int, nargs="+", default=[1, 2, 4, 8],
+                       help="Cantidades de procesos a probar")
+    parser.add_argument("--mode", choices=["player", "push"], default="push")
+    parser.add_argument("--engine", "-e", choices=["set", "bitboard"], default="bitboard")
+    parser.add_argument("--heuristic", choices=list(HEURISTICS), default="manhattan")
+
+    args = parser.parse_args()
+    for level_name in args.levels:
+        run_benchmark(level_name, args.workers, args.mode, args.engine, args.heuristic)
+
+if __name__ == "__main__":
+    main()
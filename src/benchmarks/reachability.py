@@ -0,0 +1,110 @@
+import time
+import argparse
+from collections import deque
+from pathlib import Path
+
+from src.run_sokoban.compiled_level import compile_level
+from src.run_sokoban.bitboard import get_bitboard_push_neighbors
+from src.run_sokoban.reachability import Reachability
+from src.run_sokoban.search_algorithms.astar import astar
+from src.run_sokoban.search_algorithms.heuristics import manhattan_heuristic
+
+MAPS_DIR = Path("src/maps")
+
+def tuple_bfs(player, boxes, walls):
+    """Implementación anterior: BFS con deque sobre tuplas de posiciones"""
+    reachable = set()
+    queue = deque([player])
+    while queue:
+        pos = queue.popleft()
+        if pos in reachable:
+            continue
+        reachable.add(pos)
+        r, c = pos
+        for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
+            new_pos = (r+dr, c+dc)
+            if new_pos not in walls and new_pos not in boxes and new_pos not in reachable:
+                queue.append(new_pos)
+    return reachable
+
+def cell_flood(start, box_mask, reach):
+    """Inundación celda por celda sobre máscaras, sin paralelismo de bits"""
+    free = reach.floor_mask & ~box_mask
+    offsets = (-reach.width, reach.width, -1, 1)
+    reachable = 0
+    stack = [start]
+    while stack:
+        cell = stack.pop()
+        bit = 1 << cell
+        if reachable & bit or not free & bit:
+            continue
+        reachable |= bit
+        for offset in offsets:
+            stack.append(cell + offset)
+    return reachable
+
+def record_calls(level):
+    """Consultas de alcanzabilidad que hace una búsqueda A* real en modo push"""
+    reach = level.reachability
+    calls = []
+    region = reach.region
+    reach.region = lambda start, box_mask: calls.append((start, box_mask)) or region(start, box_mask)
+    try:
+        astar(level.initial_state("push"), level, manhattan_heuristic, level.dead_squares, get_bitboard_push_neighbors)
+    finally:
+        del reach.region
+    return calls
+
+def timed(calls, func):
+    start = time.perf_counter()
+    for args in calls:
+        func(*args)
+    return time.perf_counter() - start
+
+def run_benchmark(level_name, limit=None):
+    # Sin aprender patrones la búsqueda grabada es la misma en cada corrida
+    level = compile_level(MAPS_DIR / f"{level_name}.txt", learn_patterns=False)
+    calls = record_calls(level)
+    if limit is not None:
+        calls = calls[:limit]
+
+    source = level.source
+    walls = source.walls
+    reach = level.reachability
+    positions = [(reach.position(start), frozenset(reach.position(cell) for cell in level.cells(mask))) for start, mask in calls]
+
+    # Motor nuevo con la caché vacía para no aprovechar la corrida de record_calls
+    fresh = Reachability(walls, source.floors, source.player)
+
+    results = [
+        ("deque BFS (tuplas)", timed(positions, lambda player, boxes: tuple_bfs(player, boxes, walls))),
+        ("inundación por celda", timed(calls, lambda start, mask: cell_flood(start, mask, reach))),
+        ("bit-paralelo", timed(calls, fresh.flood)),
+        ("bit-paralelo + LRU", timed(calls, fresh.region)),
+    ]
+
+    print(f"\n=== Alcanzabilidad en {level_name}: {len(calls)} llamadas ===")
+    baseline = results[0][1]
+    for name, elapsed in results:
+        per_call = elapsed / len(calls) * 1e6 if calls else 0.0
+        speedup = baseline / elapsed if elapsed else float("inf")
+        print(f"{name:<24}{per_call:>10.2f} µs/llamada{speedup:>8.1f}x")
+
+    total = fresh.hits + fresh.misses
+    if total:
+        print(f"Aciertos de la caché: {fresh.hits}/{total} ({fresh.hits / total:.0%})")
+    return results
+
+def main():
+    """Mide el costo por llamada de cada implementación de alcanzabilidad"""
+    parser = argparse.ArgumentParser(description="Benchmark de alcanzabilidad del jugador en modo push")
+    parser.add_argument("levels", nargs="+", help="Niveles a medir (ej: level_20 level_16)")
+    parser.add_argument("--limit", "-n", type=int, default=None,
+                       help="Cantidad máxima de llamadas a medir por nivel")
+
+    args = parser.parse_args()
+    for level_name in args.levels:
+        run_benchmark(level_name, args.limit)
+
+if __name__ == "__main__":
+    main()
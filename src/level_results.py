@@ -1,15 +1,30 @@
 import os
 import csv
 import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from multiprocessing import Manager
 from pathlib import Path
 
-from src.run_sokoban.search_algorithms.bfs import bfs
-from src.run_sokoban.search_algorithms.dfs import dfs
-from src.run_sokoban.search_algorithms.iddfs import iddfs
-from src.run_sokoban.search_algorithms.astar import astar
-from src.run_sokoban.search_algorithms.ggs import ggs
+from src.run_sokoban.search_algorithms.bfs import bfs_steps
+from src.run_sokoban.search_algorithms.external_bfs import external_bfs_steps, DUPLICATE_LAYERS
+from src.run_sokoban.search_algorithms.dfs import dfs_steps
+from src.run_sokoban.search_algorithms.iddfs import iddfs_steps
+from src.run_sokoban.search_algorithms.astar import astar_steps
+from src.run_sokoban.search_algorithms.ggs import ggs_steps
+from src.run_sokoban.search_algorithms.idastar import idastar_steps
+from src.run_sokoban.search_algorithms.bidirectional import bidirectional_steps
+from src.run_sokoban.search_algorithms.parallel_astar import parallel_astar_steps
+from src.run_sokoban.search_algorithms.anytime import anytime_astar_steps
+from src.run_sokoban.search_algorithms.beam import beam_search_steps, BEAM_WIDTH
+from src.run_sokoban.search_algorithms.utils import stream
+from src.run_sokoban.search_algorithms.budget import SearchBudget
+from src.run_sokoban.search_algorithms.checkpoint import Checkpointer, CHECKPOINT_INTERVAL
+from src.run_sokoban.search_algorithms.frontier import TIE_BREAKS
 from src.run_sokoban.search_algorithms.heuristics import manhattan_heuristic, heuristic_boxes_out, player_boxes, hungarian_heuristic
-from src.run_sokoban.sokoban import parse_map, SokobanState, precompute_dead_squares, get_neighbors, get_push_neighbors
+from src.run_sokoban.sokoban import get_neighbors, get_push_neighbors, get_pull_neighbors
+from src.run_sokoban.bitboard import get_bitboard_neighbors, get_bitboard_push_neighbors, get_bitboard_pull_neighbors
+from src.run_sokoban.compiled_level import compile_level, search_map, level_cache_key, CACHE_DIR
 
 MAPS_DIR = Path("src/maps")
 RESULTS_DIR = Path("src/results")
@@ -23,21 +38,311 @@ HEURISTIC_MAP = {
     "hungarian": hungarian_heuristic
 }
 
+# Generadores de sucesores por motor de estados y modo
 MODE_MAP = {
-    "player": get_neighbors,
-    "push": get_push_neighbors
+    "set": {
+        "player": get_neighbors,
+        "push": get_push_neighbors
+    },
+    "bitboard": {
+        "player": get_bitboard_neighbors,
+        "push": get_bitboard_push_neighbors
+    }
 }
 
-# Mapeo de algoritmos disponibles
+# Tirones para la mitad hacia atrás de la búsqueda bidireccional (solo modo push)
+PULL_MAP = {
+    "set": get_pull_neighbors,
+    "bitboard": get_bitboard_pull_neighbors
+}
+
+# Mapeo de algoritmos disponibles (en su versión generador, ver run_algorithm)
 ALGORITHM_MAP = {
-    "bfs": bfs,
-    "dfs": dfs, 
-    "iddfs": iddfs,
-    "astar": astar,
-    "ggs": ggs
+    "bfs": bfs_steps,
+    "external_bfs": external_bfs_steps,
+    "dfs": dfs_steps, 
+    "iddfs": iddfs_steps,
+    "astar": astar_steps,
+    "ggs": ggs_steps,
+    "idastar": idastar_steps,
+    "bidirectional": bidirectional_steps,
+    "parallel_astar": parallel_astar_steps,
+    "anytime": anytime_astar_steps,
+    "beam": beam_search_steps
+}
+
+# parallel_astar ya reparte una sola búsqueda entre procesos, external_bfs
+# cambia memoria por disco e idastar cambia memoria por tiempo (repite cada
+# iteración desde la raíz y puede tardar mucho más que A*): solo corren si se piden
+DEFAULT_ALGORITHMS = [name for name in ALGORITHM_MAP if name not in ("parallel_astar", "external_bfs", "idastar")]
+
+# Columnas del CSV de resultados
+CSV_FIELDS = [
+    "level", "algorithm", "heuristic", "success", "cost",
+    "nodes_expanded", "max_frontier", "time", "solution_length", "solution",
+    "pruned_freeze", "pruned_pattern", "weight", "cap_prunings", "stop_reason",
+    "bytes_read", "bytes_written", "checkpoint_writes", "checkpoint_time", "solution_index"
+]
+
+def build_row(level_name, algorithm, heuristic, result=None):
+    """Arma una fila del CSV; sin resultado se registra una fila de fracaso vacía"""
+    if result is None:
+        return {
+            "level": level_name,
+            "algorithm": algorithm,
+            "heuristic": heuristic,
+            "success": False,
+            "cost": None,
+            "nodes_expanded": None,
+            "max_frontier": None,
+            "time": None,
+            "solution_length": None,
+            "solution": "",
+            "pruned_freeze": None,
+            "pruned_pattern": None,
+            "weight": None,
+            "cap_prunings": None,
+            "stop_reason": None,
+            "bytes_read": None,
+            "bytes_written": None,
+            "checkpoint_writes": None,
+            "checkpoint_time": None,
+            "solution_index": None
+        }
+
+    return {
+        "level": level_name,
+        "algorithm": algorithm,
+        "heuristic": heuristic,
+        "success": result['result'],
+        "cost": result.get('cost'),
+        "nodes_expanded": result.get('nodes_expanded'),
+        "max_frontier": result.get('max_frontier'),
+        "time": result.get('time'),
+        "solution_length": len(result.get('solution', [])) if result.get('solution') else None,
+        "solution": result.get('solution'),
+        "pruned_freeze": result.get('pruned_freeze'),
+        "pruned_pattern": result.get('pruned_pattern'),
+        "weight": result.get('weight'),
+        "cap_prunings": result.get('cap_prunings'),
+        "stop_reason": result.get('stop_reason'),
+        "bytes_read": result.get('bytes_read'),
+        "bytes_written": result.get('bytes_written'),
+        "checkpoint_writes": result.get('checkpoint_writes'),
+        "checkpoint_time": result.get('checkpoint_time'),
+        "solution_index": None
+    }
+
+def build_rows(level_name, algorithm, heuristic, result=None):
+    """Filas del CSV de una corrida.
+
+    El anytime deja una fila por cada solución que fue mejorando, numerada en
+    solution_index y con el tiempo y los nodos del momento en que apareció, y
+    al final la fila de la corrida entera (totales, resultado y stop_reason).
+    """
+    if result is None or not result.get('solutions'):
+        return [build_row(level_name, algorithm, heuristic, result)]
+    rows = []
+    for index, solution in enumerate(result['solutions'], 1):
+        row = build_row(level_name, algorithm, heuristic, {"result": "Éxito", **solution})
+        row["solution_index"] = index
+        rows.append(row)
+    rows.append(build_row(level_name, algorithm, heuristic, result))
+    return rows
+
+# Nombre en el CSV de cada algoritmo; los de UNINFORMED corren sin heurística
+LABELS = {
+    "bfs": "BFS",
+    "external_bfs": "EXT-BFS",
+    "dfs": "DFS",
+    "iddfs": "IDDFS",
+    "bidirectional": "BIDIRECTIONAL",
+    "astar": "A*",
+    "ggs": "GGS",
+    "idastar": "IDA*",
+    "parallel_astar": "PA*",
+    "anytime": "ARA*",
+    "beam": "BEAM"
 }
+UNINFORMED = ["bfs", "external_bfs", "dfs", "iddfs", "bidirectional"]
+INFORMED = ["astar", "ggs", "idastar", "parallel_astar", "anytime", "beam"]
+
+# Heurísticas que nunca sobreestiman: con ellas A* e IDA* dan el costo óptimo
+ADMISSIBLE = {"manhattan", "boxes_out", "hungarian"}
+
+def algorithm_combos(algorithms_to_run, mode):
+    """Combinaciones (algoritmo, heurística) a correr, en el orden del CSV"""
+    combos = []
+    for algo_name in UNINFORMED:
+        if algo_name not in algorithms_to_run:
+            continue
+        # La búsqueda hacia atrás tira de las cajas, así que solo existe en modo push
+        if algo_name == "bidirectional" and mode != "push":
+            print("BIDIRECTIONAL solo está disponible en modo push; se omite")
+            continue
+        combos.append((algo_name, "N/A"))
+
+    for heuristic_name in HEURISTIC_MAP:
+        for algo_name in INFORMED:
+            if algo_name in algorithms_to_run:
+                combos.append((algo_name, heuristic_name))
+    return combos
+
+def is_optimal(algo_name, heuristic_name, mode):
+    """Si la combinación garantiza el costo mínimo (en push los macro-movimientos de túnel le quitan la garantía a BFS)"""
+    if algo_name in ("astar", "idastar", "parallel_astar"):
+        return heuristic_name in ADMISSIBLE
+    return algo_name == "bfs" and mode == "player"
+
+def make_budget(options, cancel=None):
+    """Presupuesto de una corrida a partir de las opciones; None si no hay ningún límite"""
+    options = options or {}
+    limits = (options.get("time_limit"), options.get("node_limit"), options.get("frontier_limit"))
+    if cancel is None and all(limit is None for limit in limits):
+        return None
+    return SearchBudget(*limits, cancel=cancel)
+
+# Algoritmos que saben guardar y retomar su estado
+CHECKPOINTED = ("bfs", "astar")
+
+def make_checkpoint(file_path, engine, mode, algo_name, heuristic_name, tie_break, options):
+    """Checkpointer de una combinación si se pidieron checkpoints o --resume; None si no.
+
+    El archivo va en la caché junto a la precomputación del nivel, con el hash
+    del mapa en el nombre: un mapa modificado no retoma un checkpoint viejo.
+    """
+    options = options or {}
+    if algo_name not in CHECKPOINTED or (options.get("checkpoint_interval") is None and not options.get("resume")):
+        return None
+    name = algo_name if heuristic_name == "N/A" else f"{algo_name}.{heuristic_name}"
+    path = CACHE_DIR / f"{level_cache_key(file_path)}.{engine}.{mode}.{name}.ckpt"
+    interval = options.get("checkpoint_interval")
+    return Checkpointer(str(path), signature=f"{engine}:{mode}:{heuristic_name}:{tie_break}",
+                        interval=CHECKPOINT_INTERVAL if interval is None else interval, resume=options.get("resume", False))
+
+def run_algorithm(level, engine, mode, algo_name, heuristic_name, tie_break="high_g", budget=None, options=None,
+                  checkpoint=None):
+    """Corre una combinación sobre un nivel compilado.
 
-def run_single_level(level_name, mode, algorithms_to_run=None):
+    budget es un SearchBudget opcional (tiempo, nodos, frontera y marca de
+    cancelación); options guarda los ajustes de algoritmos puntuales
+    (workers, on_solution, beam_width, node_cap, byte_cap, work_dir,
+    duplicate_layers, progress, on_progress). checkpoint es un Checkpointer
+    para bfs y astar. Con progress, on_progress recibe cada evento de progreso.
+    """
+    options = options or {}
+    on_progress = options.get("on_progress")
+    for event in stream(search_steps(level, engine, mode, algo_name, heuristic_name, tie_break, budget, options, checkpoint)):
+        if event.get("event") != "progress":
+            return event
+        if on_progress is not None:
+            on_progress(event)
+
+def search_steps(level, engine, mode, algo_name, heuristic_name, tie_break, budget, options, checkpoint):
+    """Generador de la búsqueda de una combinación, con los mismos argumentos que run_algorithm"""
+    sokoban_map, initial_state = search_map(level, engine, mode)
+    dead_squares = level.dead_squares
+    neighbor_finder = MODE_MAP[engine][mode]
+    progress = options.get("progress")
+
+    if algo_name == "bfs":
+        return bfs_steps(initial_state, sokoban_map.goals, sokoban_map, dead_squares, neighbor_finder, budget=budget,
+                         checkpoint=checkpoint, progress=progress)
+    if algo_name == "dfs":
+        return dfs_steps(initial_state, sokoban_map.goals, sokoban_map, dead_squares, neighbor_finder, budget=budget,
+                         progress=progress)
+    if algo_name == "external_bfs":
+        return external_bfs_steps(initial_state, sokoban_map.goals, sokoban_map, dead_squares, neighbor_finder,
+                                  work_dir=options.get("work_dir"),
+                                  duplicate_layers=options.get("duplicate_layers", DUPLICATE_LAYERS),
+                                  budget=budget, progress=progress)
+    if algo_name == "iddfs":
+        return iddfs_steps(initial_state, sokoban_map, dead_squares, neighbor_finder, 1000, budget=budget, progress=progress)
+    if algo_name == "bidirectional":
+        return bidirectional_steps(initial_state, sokoban_map, dead_squares, neighbor_finder, PULL_MAP[engine],
+                                   budget=budget, progress=progress)
+
+    if algo_name == "astar":
+        algorithm = partial(astar_steps, tie_break=tie_break, checkpoint=checkpoint)
+    elif algo_name == "parallel_astar":
+        algorithm = partial(parallel_astar_steps, workers=options.get("workers") or os.cpu_count())
+    elif algo_name == "anytime":
+        algorithm = partial(anytime_astar_steps, on_solution=options.get("on_solution"))
+    elif algo_name == "beam":
+        algorithm = partial(beam_search_steps, width=options.get("beam_width") or BEAM_WIDTH,
+                            node_cap=options.get("node_cap"), byte_cap=options.get("byte_cap"))
+    else:
+        algorithm = ALGORITHM_MAP[algo_name]
+    return algorithm(initial_state, sokoban_map, HEURISTIC_MAP[heuristic_name], dead_squares, neighbor_finder, budget=budget,
+                     progress=progress)
+
+def _portfolio_worker(file_path, engine, mode, algo_name, heuristic_name, tie_break, cancel, options):
+    """Tarea de un proceso del portafolio: compila (desde la caché) y corre una combinación"""
+    level = compile_level(file_path)
+    budget = make_budget(options, cancel)
+    checkpoint = make_checkpoint(file_path, engine, mode, algo_name, heuristic_name, tie_break, options)
+    result = run_algorithm(level, engine, mode, algo_name, heuristic_name, tie_break, budget, options, checkpoint)
+    level.deadlock_patterns.save()
+    return result
+
+def solve_portfolio(file_path, mode, combos, engine="set", tie_break="high_g", optimal=False, workers=None,
+                    options=None):
+    """Corre las combinaciones en paralelo y cancela el resto cuando una resuelve el nivel.
+
+    Con optimal=True solo gana una combinación que garantiza el costo mínimo.
+    Devuelve la combinación ganadora (o None) y un dict combinación -> resultado;
+    las que no llegaron a empezar quedan como {"result": "Cancelado", ...} y las que
+    fallaron con una excepción como None.
+    """
+    # La precomputación queda en la caché antes de que los procesos la lean
+    compile_level(file_path)
+
+    winner = None
+    results = {}
+    with Manager() as manager, ProcessPoolExecutor(max_workers=workers) as pool:
+        cancel = manager.Event()
+        futures = {
+            pool.submit(_portfolio_worker, file_path, engine, mode, algo_name, heuristic_name, tie_break, cancel,
+                        options): (algo_name, heuristic_name)
+            for algo_name, heuristic_name in combos
+        }
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                combo = futures[future]
+                if future.cancelled():
+                    results[combo] = {"result": "Cancelado", "stop_reason": "cancel"}
+                    continue
+                try:
+                    results[combo] = future.result()
+                except Exception as e:
+                    print(f"❌ Error en {LABELS[combo[0]]}_{combo[1]}: {e}")
+                    results[combo] = None
+                    continue
+
+                if winner is None and results[combo]["result"] == "Éxito" and (not optimal or is_optimal(*combo, mode)):
+                    # Las que siguen corriendo cortan en su próxima consulta a la marca
+                    winner = combo
+                    cancel.set()
+                    for other in pending:
+                        other.cancel()
+
+    return winner, {combo: results[combo] for combo in combos}
+
+def report_solution(solution):
+    """Muestra cada solución intermedia del anytime apenas aparece"""
+    print(f"  ↳ costo {solution['cost']} con w={solution['weight']} a los {solution['time']:.3f} s")
+
+def report_progress(event):
+    """Muestra el avance de la búsqueda en curso con su ritmo de expansiones"""
+    rate = event['nodes_expanded'] / event['time'] if event['time'] else 0
+    print(f"  … {event['nodes_expanded']} nodos ({rate:.0f}/s), frontera {event['frontier']}, "
+          f"mejor {event['best']}, {event['time']:.1f} s", flush=True)
+
+def run_single_level(level_name, mode, algorithms_to_run=None, engine="set", tie_break="high_g",
+                     portfolio=False, optimal=False, workers=None, options=None):
     """Ejecuta algoritmos específicos en un solo nivel"""
     file_path = MAPS_DIR / f"{level_name}.txt"
     
@@ -45,163 +350,63 @@ def run_single_level(level_name, mode, algorithms_to_run=None):
         print(f"❌ El archivo {file_path} no existe")
         return
     
-    print(f"\n=== Ejecutando algoritmos en {level_name} (modo: {mode}) ===")
+    print(f"\n=== Ejecutando algoritmos en {level_name} (modo: {mode}, motor: {engine}) ===")
     results = []
     
+    # Si no se especifican algoritmos, ejecutar todos
+    if algorithms_to_run is None:
+        algorithms_to_run = DEFAULT_ALGORITHMS
+    combos = algorithm_combos(algorithms_to_run, mode)
+    if portfolio and "parallel_astar" in algorithms_to_run:
+        # Los procesos del pool no pueden crear procesos propios
+        print("PA* no se puede correr dentro del portafolio; se omite")
+        combos = [combo for combo in combos if combo[0] != "parallel_astar"]
+
     try:
-        sokoban_map = parse_map(file_path)
-        dead_squares = precompute_dead_squares(sokoban_map)
-        initial_state = SokobanState(sokoban_map.player, sokoban_map.boxes)
-        
-        # Si no se especifican algoritmos, ejecutar todos
-        if algorithms_to_run is None:
-            algorithms_to_run = ["bfs", "dfs", "iddfs", "astar", "ggs"]
-        
-        # Ejecutar algoritmos básicos (sin heurística)
-        basic_algorithms = {
-            "bfs": lambda s: bfs(s, sokoban_map.goals, sokoban_map, dead_squares, MODE_MAP[mode]),
-            "dfs": lambda s: dfs(s, sokoban_map.goals, sokoban_map, dead_squares, MODE_MAP[mode]),
-            "iddfs": lambda s: iddfs(s, sokoban_map, dead_squares, MODE_MAP[mode], 1000),
-        }
-        
-        # Ejecutar algoritmos básicos seleccionados
-        for algo_name in algorithms_to_run:
-            if algo_name in basic_algorithms:
-                print(f"Corriendo {algo_name.upper()} en {level_name}...")
-                result = basic_algorithms[algo_name](initial_state)
-                
-                results.append({
-                    "level": level_name,
-                    "algorithm": algo_name.upper(),
-                    "heuristic": "N/A",
-                    "success": result['result'],
-                    "cost": result.get('cost'),
-                    "nodes_expanded": result.get('nodes_expanded'),
-                    "max_frontier": result.get('max_frontier'),
-                    "time": result.get('time'),
-                    "solution_length": len(result.get('solution', [])) if result.get('solution') else None,
-                    "solution": result.get('solution')
-                })
-                print(f"✔ {algo_name.upper()} completado (success={result['result']})")
-        
-        # Ejecutar A* y GGS con diferentes heurísticas (si están seleccionados)
-        if "astar" in algorithms_to_run or "ggs" in algorithms_to_run:
-            for heuristic_name in ["manhattan", "boxes_out", "player_boxes", "hungarian"]:
-                heuristic_func = HEURISTIC_MAP[heuristic_name]
-                
-                # A* con heurística específica
-                if "astar" in algorithms_to_run:
-                    print(f"Corriendo A* con {heuristic_name} en {level_name}...")
-                    try:
-                        result_astar = astar(initial_state, sokoban_map, heuristic_func, dead_squares, MODE_MAP[mode])
-                        
-                        results.append({
-                            "level": level_name,
-                            "algorithm": "A*",
-                            "heuristic": heuristic_name,
-                            "success": result_astar['result'],
-                            "cost": result_astar.get('cost'),
-                            "nodes_expanded": result_astar.get('nodes_expanded'),
-                            "max_frontier": result_astar.get('max_frontier'),
-                            "time": result_astar.get('time'),
-                            "solution_length": len(result_astar.get('solution', [])) if result_astar.get('solution') else None,
-                            "solution": result_astar.get('solution'),
-                        })
-                        print(f"✔ A*_{heuristic_name} completado (success={result_astar['result']})")
-                    except Exception as e:
-                        print(f"❌ Error en A*_{heuristic_name}: {e}")
-                        results.append({
-                            "level": level_name,
-                            "algorithm": "A*",
-                            "heuristic": heuristic_name,
-                            "success": False,
-                            "cost": None,
-                            "nodes_expanded": None,
-                            "max_frontier": None,
-                            "time": None,
-                            "solution_length": None,
-                            "solution": ""
-                        })
-                
-                # GGS con heurística específica
-                if "ggs" in algorithms_to_run:
-                    print(f"Corriendo GGS con {heuristic_name} en {level_name}...")
-                    try:
-                        result_ggs = ggs(initial_state, sokoban_map, heuristic_func, dead_squares, MODE_MAP[mode])
-                        
-                        results.append({
-                            "level": level_name,
-                            "algorithm": "GGS",
-                            "heuristic": heuristic_name,
-                            "success": result_ggs['result'],
-                            "cost": result_ggs.get('cost'),
-                            "nodes_expanded": result_ggs.get('nodes_expanded'),
-                            "max_frontier": result_ggs.get('max_frontier'),
-                            "time": result_ggs.get('time'),
-                            "solution_length": len(result_ggs.get('solution', [])) if result_ggs.get('solution') else None,
-                            "solution": result_ggs.get('solution'),
-                        })
-                        print(f"✔ GGS_{heuristic_name} completado (success={result_ggs['result']})")
-                    except Exception as e:
-                        print(f"❌ Error en GGS_{heuristic_name}: {e}")
-                        results.append({
-                            "level": level_name,
-                            "algorithm": "GGS",
-                            "heuristic": heuristic_name,
-                            "success": False,
-                            "cost": None,
-                            "nodes_expanded": None,
-                            "max_frontier": None,
-                            "time": None,
-                            "solution_length": None,
-                            "solution": ""
-                        })
+        if portfolio:
+            # Todas las combinaciones a la vez; se registran también las canceladas
+            print(f"Corriendo {len(combos)} combinaciones en paralelo en {level_name}...")
+            winner, portfolio_results = solve_portfolio(file_path, mode, combos, engine, tie_break, optimal, workers, options)
+            for (algo_name, heuristic_name), result in portfolio_results.items():
+                results.extend(build_rows(level_name, LABELS[algo_name], heuristic_name, result))
+            if winner is None:
+                print("✔ Portafolio completado sin solución")
+            else:
+                print(f"✔ Portafolio completado: ganó {LABELS[winner[0]]} ({winner[1]})")
+        else:
+            # La precomputación del nivel se reutiliza desde la caché entre corridas
+            level = compile_level(file_path)
+            for algo_name, heuristic_name in combos:
+                label = LABELS[algo_name]
+                name = label if heuristic_name == "N/A" else f"{label}_{heuristic_name}"
+                print(f"Corriendo {name} en {level_name}...")
+                try:
+                    checkpoint = make_checkpoint(file_path, engine, mode, algo_name, heuristic_name, tie_break, options)
+                    result = run_algorithm(level, engine, mode, algo_name, heuristic_name, tie_break, make_budget(options),
+                                           {**(options or {}), "workers": workers, "on_solution": report_solution,
+                                            "on_progress": report_progress},
+                                           checkpoint)
+                    if result.get('checkpoint_writes'):
+                        print(f"  ↳ {result['checkpoint_writes']} checkpoints en {result['checkpoint_time']:.3f} s "
+                              f"({result['checkpoint_bytes']} bytes el último)")
+                    results.extend(build_rows(level_name, label, heuristic_name, result))
+                    print(f"✔ {name} completado (success={result['result']})")
+                except Exception as e:
+                    print(f"❌ Error en {name}: {e}")
+                    results.append(build_row(level_name, label, heuristic_name))
+
+            # Los patrones de deadlock aprendidos quedan para las próximas corridas
+            level.deadlock_patterns.save()
                 
     except Exception as e:
         print(f"❌ Error general en {level_name}: {e}")
         # Añadir entradas vacías para los algoritmos seleccionados
-        for algo_name in algorithms_to_run:
-            if algo_name in ["bfs", "dfs", "iddfs"]:
-                results.append({
-                    "level": level_name,
-                    "algorithm": algo_name.upper(),
-                    "heuristic": "N/A",
-                    "success": False,
-                    "cost": None,
-                    "nodes_expanded": None,
-                    "max_frontier": None,
-                    "time": None,
-                    "solution_length": None,
-                    "solution": ""
-                })
-        
-        if "astar" in algorithms_to_run or "ggs" in algorithms_to_run:
-            for heuristic_name in ["manhattan", "boxes_out", "player_boxes", "hungarian"]:
-                for algo_name in ["A*", "GGS"]:
-                    if (algo_name == "A*" and "astar" in algorithms_to_run) or (algo_name == "GGS" and "ggs" in algorithms_to_run):
-                        results.append({
-                            "level": level_name,
-                            "algorithm": algo_name,
-                            "heuristic": heuristic_name,
-                            "success": False,
-                            "cost": None,
-                            "nodes_expanded": None,
-                            "max_frontier": None,
-                            "time": None,
-                            "solution_length": None,
-                            "solution": ""
-                        })
+        results = [build_row(level_name, LABELS[algo_name], heuristic_name) for algo_name, heuristic_name in combos]
 
     # Guardar CSV para este nivel
     out_file = RESULTS_DIR / f"{level_name}_{mode}_results.csv"
     with open(out_file, "w", newline="", encoding='utf-8') as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "level", "algorithm", "heuristic", "success", "cost", 
-                "nodes_expanded", "max_frontier", "time", "solution_length", "solution"
-            ]
-        )
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
         writer.writeheader()
         writer.writerows(results)
 
@@ -214,11 +419,57 @@ def main():
     parser = argparse.ArgumentParser(description="Ejecutar algoritmos de Sokoban en un nivel específico")
     parser.add_argument("level", help="Nombre del nivel (ej: level_1, level_2)")
     parser.add_argument("mode", choices=["player", "push"], help="Modo de ejecución: player o push")
-    parser.add_argument("--algorithms", "-a", nargs="+", choices=["bfs", "dfs", "iddfs", "astar", "ggs"],
+    parser.add_argument("--algorithms", "-a", nargs="+", choices=list(ALGORITHM_MAP),
                        help="Algoritmos específicos a ejecutar (por defecto: todos)")
+    parser.add_argument("--engine", "-e", choices=list(MODE_MAP), default="set",
+                       help="Motor de estados: set (frozenset de cajas) o bitboard (máscara de bits)")
+    parser.add_argument("--tie-break", "-t", choices=TIE_BREAKS, default="high_g",
+                       help="Desempate de A* entre nodos con el mismo f (high_g y low_h son equivalentes)")
+    parser.add_argument("--portfolio", "-p", action="store_true",
+                       help="Correr las combinaciones en paralelo y cortar cuando la primera resuelve el nivel")
+    parser.add_argument("--optimal", action="store_true",
+                       help="Con --portfolio, esperar a la primera solución de costo óptimo garantizado")
+    parser.add_argument("--workers", "-w", type=int, default=None,
+                       help="Procesos del portafolio o de parallel_astar (por defecto: uno por núcleo)")
+    parser.add_argument("--time-limit", type=float, default=None,
+                       help="Segundos máximos de cada búsqueda (por defecto: sin límite)")
+    parser.add_argument("--node-limit", type=int, default=None,
+                       help="Expansiones máximas de cada búsqueda")
+    parser.add_argument("--frontier-limit", type=int, default=None,
+                       help="Tamaño máximo de la frontera de cada búsqueda")
+    parser.add_argument("--beam-width", type=int, default=BEAM_WIDTH,
+                       help="Estados que sobreviven en cada capa de la búsqueda beam")
+    parser.add_argument("--node-cap", type=int, default=None,
+                       help="Nodos máximos guardados por la búsqueda beam")
+    parser.add_argument("--byte-cap", type=int, default=None,
+                       help="Bytes máximos (estimados) guardados por la búsqueda beam")
+    parser.add_argument("--work-dir", default=None,
+                       help="Carpeta de los archivos de capas de external_bfs (por defecto: la temporal del sistema)")
+    parser.add_argument("--duplicate-layers", type=int, default=DUPLICATE_LAYERS,
+                       help="Capas anteriores contra las que external_bfs elimina duplicados (0: todas)")
+    parser.add_argument("--progress", type=int, default=None,
+                       help="Mostrar el avance cada N expansiones (por defecto: solo el resultado)")
+    parser.add_argument("--checkpoint-interval", type=float, default=None,
+                       help=f"Segundos entre checkpoints de bfs y astar (con --resume, por defecto {CHECKPOINT_INTERVAL:.0f})")
+    parser.add_argument("--resume", action="store_true",
+                       help="Retomar bfs y astar desde su último checkpoint, si existe")
     
     args = parser.parse_args()
-    run_single_level(args.level, args.mode, args.algorithms)
+    options = {
+        "time_limit": args.time_limit,
+        "node_limit": args.node_limit,
+        "frontier_limit": args.frontier_limit,
+        "beam_width": args.beam_width,
+        "node_cap": args.node_cap,
+        "byte_cap": args.byte_cap,
+        "work_dir": args.work_dir,
+        "duplicate_layers": args.duplicate_layers or None,
+        "checkpoint_interval": args.checkpoint_interval,
+        "resume": args.resume,
+        "progress": args.progress
+    }
+    run_single_level(args.level, args.mode, args.algorithms, args.engine, args.tie_break,
+                     args.portfolio, args.optimal, args.workers, options)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,73 @@
+from array import array
+
+# Almacén compacto de nodos: en lugar de que cada estado guarde una referencia
+# a su padre, la búsqueda trabaja con ids enteros y las columnas guardan el
+# padre, el movimiento (como código) y el costo g de cada nodo.
+#
+# Los estados tampoco se guardan como objetos: cada nodo tiene una clave, un
+# único int con la máscara de cajas corrida a la izquierda y la celda del
+# jugador en los bits bajos (ver encode_state). Los conjuntos de explorados de
+# las búsquedas usan la misma clave, así que el int se comparte, y el estado
+# completo se arma solo al expandir el nodo.
+
+class NodeArena:
+    __slots__ = ("sokoban_map", "keys", "parents", "move_codes", "costs", "_move_table", "_move_index", "_shift",
+                 "_player_mask")
+
+    def __init__(self, sokoban_map):
+        # El mapa guarda los ids iniciales de las cajas para reconstruir la solución
+        self.sokoban_map = sokoban_map
+        self.keys = []
+        self.parents = array("l")
+        self.move_codes = array("l")
+        self.costs = array("l")
+        self._move_table = []
+        self._move_index = {}
+        # Bits que necesita la celda del jugador (un índice menor que el largo de la máscara de piso)
+        self._shift = sokoban_map.reachability.floor_mask.bit_length().bit_length()
+        self._player_mask = (1 << self._shift) - 1
+
+    def __len__(self):
+        return len(self.keys)
+
+    def key(self, state):
+        player, box_mask = self.sokoban_map.encode_state(state)
+        return box_mask << self._shift | player
+
+    def state(self, node):
+        key = self.keys[node]
+        return self.sokoban_map.decode_state(key & self._player_mask, key >> self._shift)
+
+    def add(self, state, parent=-1, move=None, cost=0):
+        return self.add_key(self.key(state), parent, move, cost)
+
+    def add_key(self, key, parent=-1, move=None, cost=0):
+        code = self._move_index.get(move)
+        if code is None:
+            code = len(self._move_table)
+            self._move_index[move] = code
+            self._move_table.append(move)
+
+        self.keys.append(key)
+        self.parents.append(parent)
+        self.move_codes.append(code)
+        self.costs.append(cost)
+        return len(self.keys) - 1
+
+    def move(self, node):
+        return self._move_table[self.move_codes[node]]
+
+    def columns(self):
+        # Todo menos las claves, para guardar la arena en un checkpoint
+        return self.parents, self.move_codes, self.costs, self._move_table
+
+    @classmethod
+    def from_columns(cls, sokoban_map, keys, parents, move_codes, costs, move_table):
+        arena = cls(sokoban_map)
+        arena.keys = keys
+        arena.parents = array("l", parents)
+        arena.move_codes = array("l", move_codes)
+        arena.costs = array("l", costs)
+        arena._move_table = list(move_table)
+        arena._move_index = {move: code for code, move in enumerate(arena._move_table)}
+        return arena
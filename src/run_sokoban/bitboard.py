@@ -0,0 +1,347 @@
+from .sokoban import move_cost, OPPOSITE
+
+# Motor alternativo de estados: cada celda del mapa se numera como r * width + c
+# y la configuración de cajas es un único int con un bit por celda ocupada.
+
+DIRECTIONS = ("Up", "Down", "Left", "Right")
+
+class BitboardMap:
+    def __init__(self, sokoban_map):
+        self.source = sokoban_map
+        self.walls = sokoban_map.walls
+        self.goals = sokoban_map.goals
+        self.boxes = sokoban_map.boxes
+        self.player = sokoban_map.player
+        self.floors = sokoban_map.floors
+
+        # La numeración de celdas y el piso interior son los del motor de
+        # alcanzabilidad del mapa (con su columna extra de separación)
+        self.reachability = sokoban_map.reachability
+        self.width = self.reachability.width
+        self.offsets = {
+            "Up": -self.width,
+            "Down": self.width,
+            "Left": -1,
+            "Right": 1
+        }
+
+        self.player_index = self.index(self.player)
+        self.floor_mask = self.reachability.floor_mask
+        self.goal_mask = self.mask_of(self.goals)
+        self.initial_mask = self.mask_of(box.pos for box in self.boxes)
+        self.box_ids = {self.index(box.pos): box.id for box in self.boxes}
+
+        # Claves Zobrist del mapa original indexadas por número de celda
+        size = self.index(max(self.walls | self.floors)) + self.width
+        self.zobrist_boxes = [0] * size
+        self.zobrist_player = [0] * size
+        for pos in self.floors:
+            self.zobrist_boxes[self.index(pos)] = sokoban_map.zobrist_boxes[pos]
+            self.zobrist_player[self.index(pos)] = sokoban_map.zobrist_player[pos]
+
+        self._dead_source = None
+        self._dead_mask = 0
+
+        # Base de patrones de deadlock (la asigna compile_level)
+        self.deadlock_patterns = None
+
+        self.tunnel_masks = {action: self.mask_of(cells) & self.floor_mask for action, cells in sokoban_map.tunnels.items()}
+
+        # Cuarto de metas con su orden de llenado (lo asigna CompiledLevel)
+        self.goal_room = None
+
+    def __repr__(self):
+        return f"<BitboardMap width={self.width} boxes={len(self.boxes)} goals={len(self.goals)}>"
+
+    def index(self, pos):
+        return pos[0] * self.width + pos[1]
+
+    def position(self, idx):
+        return divmod(idx, self.width)
+
+    def mask_of(self, positions):
+        mask = 0
+        for pos in positions:
+            mask |= 1 << self.index(pos)
+        return mask
+
+    def cells(self, mask):
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def dead_mask(self, dead_squares):
+        if dead_squares is not self._dead_source:
+            self._dead_source = dead_squares
+            self._dead_mask = self.mask_of(dead_squares) & ~self.goal_mask
+        return self._dead_mask
+
+    def zobrist(self, player_index, box_mask):
+        value = self.zobrist_player[player_index]
+        for cell in self.cells(box_mask):
+            value ^= self.zobrist_boxes[cell]
+        return value
+
+    def initial_state(self, mode="player"):
+        player_index = self.player_index
+        if mode == "push":
+            # Con empujes la raíz usa el mismo representante de región que get_bitboard_push_neighbors
+            region = compute_reachable_mask(player_index, self.initial_mask, self)
+            player_index = (region & -region).bit_length() - 1
+        return BitboardState(self, player_index, self.initial_mask)
+
+    def pack_state(self, state):
+        # Sin la referencia al tablero: solo los ints que definen el estado
+        return (state.player_index, state.box_mask, state.zobrist)
+
+    def unpack_state(self, packed):
+        player_index, box_mask, zobrist = packed
+        return BitboardState(self, player_index, box_mask, zobrist=zobrist)
+
+    def encode_state(self, state):
+        # Misma numeración que el motor set: los registros en disco no dependen del motor
+        return state.player_index, state.box_mask
+
+    def decode_state(self, player_index, box_mask):
+        return BitboardState(self, player_index, box_mask)
+
+    def goal_states(self):
+        # Un estado resuelto por cada región libre que dejan las cajas en las metas
+        free = self.floor_mask & ~self.goal_mask
+        states = []
+        while free:
+            region = compute_reachable_mask((free & -free).bit_length() - 1, self.goal_mask, self)
+            player = (region & -region).bit_length() - 1
+            states.append(BitboardState(self, player, self.goal_mask))
+            free &= ~region
+        return states
+
+    def label_moves(self, moves):
+        # Traduce movimientos (acción, celda de la caja) a (acción, id de la caja)
+        ids = dict(self.box_ids)
+        labeled = []
+        for move in moves:
+            action, cell = move[0], move[1]
+            if cell is None:
+                labeled.append((action, None))
+                continue
+            pushes = move_cost(move)
+            box_id = ids.pop(cell)
+            ids[cell + pushes * self.offsets[action]] = box_id
+            labeled.extend([(action, box_id)] * pushes)
+        return labeled
+
+class BitboardState:
+    __slots__ = ("board", "player_index", "box_mask", "zobrist")
+
+    def __init__(self, board, player_index, box_mask, zobrist=None):
+        self.board = board
+        self.player_index = player_index
+        self.box_mask = box_mask
+        self.zobrist = board.zobrist(player_index, box_mask) if zobrist is None else zobrist
+
+    @property
+    def player(self):
+        return self.board.position(self.player_index)
+
+    @property
+    def boxes(self):
+        return frozenset(self.board.position(idx) for idx in self.board.cells(self.box_mask))
+
+    def is_goal(self, goals):
+        return self.box_mask == self.board.goal_mask
+
+    def __hash__(self):
+        return self.zobrist
+
+    def __eq__(self, other):
+        return self.zobrist == other.zobrist and self.player_index == other.player_index and self.box_mask == other.box_mask
+
+def is_box_stuck_mask(cell, box_mask, board):
+    if (1 << cell) & board.goal_mask:
+        return False
+
+    for offset in board.offsets.values():
+        target = 1 << (cell + offset)
+        if target & board.floor_mask and not target & box_mask:
+            return False
+    return True
+
+def is_freeze_deadlock_mask(cell, box_mask, board, dead):
+    frozen = []
+    if _is_frozen_mask(cell, box_mask, board, dead, 0, frozen):
+        return any(not (1 << box) & board.goal_mask for box in frozen)
+    return False
+
+def _is_frozen_mask(cell, box_mask, board, dead, checked, frozen):
+    # Misma lógica que _is_frozen en sokoban.py: checked son cajas tratadas como pared
+    checked |= 1 << cell
+    blocking = ~board.floor_mask | checked
+    chain = [cell]
+    for step in (1, board.width):
+        before = cell - step
+        after = cell + step
+
+        if (blocking >> before | blocking >> after) & 1:
+            continue
+        if dead >> before & dead >> after & 1:
+            continue
+        if any(box_mask >> n & 1 and _is_frozen_mask(n, box_mask, board, dead, checked, chain) for n in (before, after)):
+            continue
+        return False
+
+    frozen.extend(chain)
+    return True
+
+def compute_reachable_mask(player_index, box_mask, board):
+    return board.reachability.region(player_index, box_mask)
+
+def get_bitboard_neighbors(state, board, dead_squares, pruned=None):
+    neighbors = []
+
+    floor = board.floor_mask
+    dead = board.dead_mask(dead_squares)
+    boxes = state.box_mask
+    zobrist_boxes = board.zobrist_boxes
+    zobrist_player = board.zobrist_player
+    patterns = board.deadlock_patterns
+
+    for action in DIRECTIONS:
+        offset = board.offsets[action]
+        new_pos = state.player_index + offset
+        new_bit = 1 << new_pos
+
+        if not floor & new_bit:
+            continue
+
+        new_boxes = boxes
+        new_hash = state.zobrist ^ zobrist_player[state.player_index] ^ zobrist_player[new_pos]
+        box_cell = None
+        if boxes & new_bit:
+            target = new_pos + offset
+            target_bit = 1 << target
+
+            if not floor & target_bit or boxes & target_bit:
+                continue
+
+            if dead & target_bit:
+                continue
+
+            new_boxes = boxes ^ new_bit | target_bit
+            if is_box_stuck_mask(target, new_boxes, board):
+                continue
+
+            if is_freeze_deadlock_mask(target, new_boxes, board, dead):
+                if pruned is not None:
+                    pruned["freeze"] += 1
+                continue
+
+            if patterns is not None and patterns.is_deadlock(target, new_boxes, dead):
+                if pruned is not None:
+                    pruned["pattern"] += 1
+                continue
+
+            box_cell = new_pos
+            new_hash ^= zobrist_boxes[new_pos] ^ zobrist_boxes[target]
+
+        neighbors.append(((action, box_cell), BitboardState(board, new_pos, new_boxes, zobrist=new_hash)))
+
+    return neighbors
+
+def get_bitboard_push_neighbors(state, board, dead_squares, pruned=None):
+    neighbors = []
+
+    floor = board.floor_mask
+    dead = board.dead_mask(dead_squares)
+    boxes = state.box_mask
+
+    zobrist_boxes = board.zobrist_boxes
+    zobrist_player = board.zobrist_player
+    patterns = board.deadlock_patterns
+    tunnel_masks = board.tunnel_masks
+    goal_room = board.goal_room
+
+    reachable = compute_reachable_mask(state.player_index, boxes, board)
+    base_hash = state.zobrist ^ zobrist_player[state.player_index]
+
+    for box_cell in board.cells(boxes):
+        box_bit = 1 << box_cell
+        for action in DIRECTIONS:
+            offset = board.offsets[action]
+
+            if not reachable & (1 << (box_cell - offset)):
+                continue
+
+            target = box_cell + offset
+            target_bit = 1 << target
+
+            if not floor & target_bit or boxes & target_bit:
+                continue
+
+            if dead & target_bit:
+                continue
+
+            # Macro-movimiento de túnel, igual que en get_push_neighbors
+            pushes = 1
+            player_cell = box_cell
+            tunnel = tunnel_masks[action]
+            while (tunnel >> player_cell & tunnel >> target & 1) and not board.goal_mask & target_bit:
+                next_bit = 1 << (target + offset)
+                if not floor & next_bit or boxes & next_bit or dead & next_bit:
+                    break
+                player_cell, target, target_bit = target, target + offset, next_bit
+                pushes += 1
+
+            if goal_room is not None and not goal_room.allows_push_mask(box_cell, target, boxes):
+                continue
+
+            new_boxes = boxes ^ box_bit | target_bit
+            if is_box_stuck_mask(target, new_boxes, board):
+                continue
+
+            if is_freeze_deadlock_mask(target, new_boxes, board, dead):
+                if pruned is not None:
+                    pruned["freeze"] += 1
+                continue
+
+            if patterns is not None and patterns.is_deadlock(target, new_boxes, dead):
+                if pruned is not None:
+                    pruned["pattern"] += 1
+                continue
+
+            # El jugador se normaliza a la celda más baja de su región alcanzable
+            region = compute_reachable_mask(box_cell, new_boxes, board)
+            new_player = (region & -region).bit_length() - 1
+            new_hash = base_hash ^ zobrist_player[new_player] ^ zobrist_boxes[box_cell] ^ zobrist_boxes[target]
+            push = (action, box_cell) if pushes == 1 else (action, box_cell, pushes)
+            neighbors.append((push, BitboardState(board, new_player, new_boxes, zobrist=new_hash)))
+
+    return neighbors
+
+def get_bitboard_pull_neighbors(state, board, dead_squares, pruned=None):
+    # Tirones para la búsqueda hacia atrás, igual que en get_pull_neighbors
+    neighbors = []
+
+    boxes = state.box_mask
+    zobrist_boxes = board.zobrist_boxes
+    zobrist_player = board.zobrist_player
+
+    reachable = compute_reachable_mask(state.player_index, boxes, board)
+    base_hash = state.zobrist ^ zobrist_player[state.player_index]
+
+    for box_cell in board.cells(boxes):
+        for action in DIRECTIONS:
+            offset = board.offsets[action]
+            pull_from = box_cell + offset
+
+            if not reachable >> pull_from & 1 or not reachable >> (pull_from + offset) & 1:
+                continue
+
+            new_boxes = boxes ^ (1 << box_cell) | (1 << pull_from)
+            region = compute_reachable_mask(pull_from + offset, new_boxes, board)
+            new_player = (region & -region).bit_length() - 1
+            new_hash = base_hash ^ zobrist_player[new_player] ^ zobrist_boxes[box_cell] ^ zobrist_boxes[pull_from]
+            neighbors.append(((OPPOSITE[action], pull_from), BitboardState(board, new_player, new_boxes, zobrist=new_hash)))
+
+    return neighbors
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from .sokoban import parse_map, precompute_dead_squares
+from .bitboard import BitboardMap, DIRECTIONS
+from .goal_room import find_goal_room
+from .deadlocks import DeadlockPatterns, load_deadlock_patterns
+
+# Se incrementa cada vez que cambia lo que guarda CompiledLevel para invalidar la caché
+CACHE_VERSION = 8
+CACHE_DIR = Path(__file__).resolve().parent.parent / "cache"
+
+# Todo lo que se puede precalcular de un mapa, calculado una sola vez por archivo
+class CompiledLevel(BitboardMap):
+    def __init__(self, sokoban_map):
+        super().__init__(sokoban_map)
+        self.dead_squares = precompute_dead_squares(sokoban_map)
+        self.floor_cells = tuple(self.cells(self.floor_mask))
+        self.goal_cells = tuple(sorted(self.index(goal) for goal in self.goals))
+
+        # Vecinos de cada celda de piso en el orden de DIRECTIONS (-1 si no es piso)
+        size = len(self.zobrist_boxes)
+        self.neighbor_table = [None] * size
+        for cell in self.floor_cells:
+            self.neighbor_table[cell] = tuple(
+                cell + self.offsets[action] if self.floor_mask >> (cell + self.offsets[action]) & 1 else -1
+                for action in DIRECTIONS
+            )
+
+        # Distancia de cada celda a cada meta (filas: celda, columnas: goal_cells)
+        self.goal_distances = np.zeros((size, len(self.goal_cells)), dtype=int)
+        for cell in self.floor_cells:
+            r, c = self.position(cell)
+            for j, goal in enumerate(self.goal_cells):
+                gr, gc = self.position(goal)
+                self.goal_distances[cell, j] = abs(r - gr) + abs(c - gc)
+        self.min_goal_distance = [int(row.min()) if len(row) else 0 for row in self.goal_distances]
+        # El motor set usa las mismas tablas: la numeración de celdas es la de reachability
+        sokoban_map.goal_distances = self.goal_distances
+        sokoban_map.min_goal_distance = self.min_goal_distance
+
+        # Orden de llenado del cuarto de metas; el mapa original lo comparte para el motor set
+        self.goal_room = find_goal_room(sokoban_map)
+        if self.goal_room is not None:
+            self.goal_room.compile(self)
+        sokoban_map.goal_room = self.goal_room
+
+    def __repr__(self):
+        return f"<CompiledLevel cells={len(self.floor_cells)} boxes={len(self.boxes)} goals={len(self.goals)}>"
+
+def level_cache_key(filepath):
+    with open(filepath, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def cache_path(filepath, cache_dir=CACHE_DIR, suffix="level"):
+    return Path(cache_dir) / f"{level_cache_key(filepath)}.v{CACHE_VERSION}.{suffix}.pkl"
+
+def write_cache(path, payload):
+    # Escritura atómica: un proceso que lee en paralelo nunca ve un archivo a medias
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def compile_level(filepath, cache_dir=CACHE_DIR, use_cache=True, learn_patterns=True):
+    level = _load_level(filepath, cache_dir, use_cache)
+
+    # Los patrones aprendidos van en un archivo aparte porque crecen entre corridas;
+    # con learn_patterns=False las búsquedas solo usan los ya conocidos
+    patterns_path = cache_path(filepath, cache_dir, suffix="deadlocks") if use_cache else None
+    if patterns_path is not None:
+        patterns = load_deadlock_patterns(level, patterns_path, learn_patterns)
+    else:
+        patterns = DeadlockPatterns(level, learning=learn_patterns)
+    level.deadlock_patterns = patterns
+    level.source.deadlock_patterns = patterns
+    return level
+
+def _load_level(filepath, cache_dir, use_cache):
+    path = cache_path(filepath, cache_dir)
+    if use_cache and path.exists():
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+    level = CompiledLevel(parse_map(filepath))
+    if use_cache:
+        write_cache(path, level)
+    return level
+
+def search_map(level, engine, mode="player"):
+    # El motor set trabaja sobre el SokobanMap original y el bitboard sobre el nivel compilado
+    sokoban_map = level if engine == "bitboard" else level.source
+    return sokoban_map, sokoban_map.initial_state(mode)
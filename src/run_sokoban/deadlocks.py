@@ -0,0 +1,198 @@
+import pickle
+from collections import deque
+
+from .bitboard import compute_reachable_mask, is_freeze_deadlock_mask
+
+# Base de patrones de deadlock por nivel. Un patrón es la máscara de un grupo
+# de celdas que, ocupadas todas por cajas, hacen el nivel irresoluble sin
+# importar dónde esté el resto de las cajas ni el jugador.
+
+WINDOW_RADIUS = 2       # Radio (Chebyshev) de la ventana local alrededor de la caja movida
+MAX_CLUSTER = 3         # Grupos más grandes no se analizan
+SUBSEARCH_LIMIT = 200   # Estados de la sub-búsqueda antes de rendirse
+SAFE_LIMIT = 100000     # Tamaño máximo de la caché de grupos que no son deadlock
+
+class DeadlockPatterns:
+    def __init__(self, level, path=None, learning=True):
+        self.level = level
+        self.path = path
+        self.patterns = set()
+        self.learned = set()
+        self.by_cell = {}
+        self.safe = set()
+        self.dirty = False
+        # Sin aprendizaje solo se usan los patrones semilla y los del archivo:
+        # corridas repetidas podan exactamente lo mismo (para comparar tiempos)
+        self.learning = learning
+
+        self.windows = {cell: self._window(cell) for cell in level.floor_cells}
+        for pattern in seed_patterns(level):
+            self._index(pattern)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def _window(self, cell):
+        r, c = self.level.position(cell)
+        mask = 0
+        for dr in range(-WINDOW_RADIUS, WINDOW_RADIUS + 1):
+            for dc in range(-WINDOW_RADIUS, WINDOW_RADIUS + 1):
+                if r + dr >= 0 and c + dc >= 0:
+                    mask |= 1 << self.level.index((r + dr, c + dc))
+        return mask & self.level.floor_mask
+
+    def _index(self, pattern):
+        if pattern in self.patterns:
+            return
+        self.patterns.add(pattern)
+        for cell in self.level.cells(pattern):
+            self.by_cell.setdefault(cell, []).append(pattern)
+
+    def learn(self, pattern):
+        self._index(pattern)
+        self.learned.add(pattern)
+        self.dirty = True
+
+    def is_deadlock(self, cell, box_mask, dead):
+        # Primero los patrones conocidos que tocan la celda a la que llegó la caja
+        for pattern in self.by_cell.get(cell, ()):
+            if box_mask & pattern == pattern:
+                return True
+
+        if not self.learning:
+            return False
+
+        # Solo se analiza una caja que quedó pegada a otra
+        if not any(box_mask >> (cell + offset) & 1 for offset in self.level.offsets.values()):
+            return False
+
+        cluster = box_mask & self.windows[cell]
+        if not 2 <= cluster.bit_count() <= MAX_CLUSTER or cluster in self.safe:
+            return False
+
+        if cluster_is_deadlocked(self.level, cluster, self.windows[cell], dead):
+            self.learn(cluster)
+            return True
+
+        if len(self.safe) >= SAFE_LIMIT:
+            self.safe.clear()
+        self.safe.add(cluster)
+        return False
+
+    def is_deadlock_at(self, pos, boxes, dead_squares):
+        # Entrada para el motor set, que trabaja con posiciones
+        level = self.level
+        return self.is_deadlock(level.index(pos), level.mask_of(boxes), level.dead_mask(dead_squares))
+
+    def save(self):
+        if not self.dirty or self.path is None:
+            return
+        from .compiled_level import write_cache
+        # Otros procesos (el portafolio corre varios sobre el mismo nivel) pueden
+        # haber guardado sus patrones desde que se cargó el archivo: se suman
+        # justo antes de escribir para no pisarlos
+        for pattern in read_patterns(self.path):
+            self._index(pattern)
+            self.learned.add(pattern)
+        write_cache(self.path, sorted(self.learned))
+        self.dirty = False
+
+def seed_patterns(level):
+    floor = level.floor_mask
+    goals = level.goal_mask
+    width = level.width
+    patterns = []
+
+    for cell in level.floor_cells:
+        # Bloques 2x2 de cajas y paredes (cell es la esquina superior izquierda)
+        block = (cell, cell + 1, cell + width, cell + width + 1)
+        mask = 0
+        for corner in block:
+            if floor >> corner & 1:
+                mask |= 1 << corner
+        if mask.bit_count() >= 2 and mask & ~goals:
+            patterns.append(mask)
+
+        # Dos cajas juntas contra la misma pared no pueden separarse de ella
+        for step, side in ((1, width), (width, 1)):
+            other = cell + step
+            if not floor >> other & 1:
+                continue
+            pair = 1 << cell | 1 << other
+            if not pair & ~goals:
+                continue
+            for wall_side in (-side, side):
+                if not floor >> (cell + wall_side) & 1 and not floor >> (other + wall_side) & 1:
+                    patterns.append(pair)
+                    break
+
+    return patterns
+
+def cluster_is_deadlocked(level, cluster, window, dead):
+    # Sub-búsqueda por empujes solo con las cajas del grupo: quitar cajas nunca
+    # vuelve irresoluble una posición resoluble, así que si el grupo no puede
+    # llegar a las metas desde ninguna región del jugador, es un deadlock.
+    # Si una caja sale de la ventana o se agota el límite no se concluye nada.
+    floor = level.floor_mask
+    goals = level.goal_mask
+    offsets = tuple(level.offsets.values())
+
+    starts = []
+    covered = 0
+    free = floor & ~cluster
+    for box in level.cells(cluster):
+        for offset in offsets:
+            cell = box + offset
+            if free >> cell & 1 and not covered >> cell & 1:
+                region = compute_reachable_mask(cell, cluster, level)
+                covered |= region
+                starts.append(((region & -region).bit_length() - 1, cluster))
+
+    visited = set(starts)
+    queue = deque(starts)
+    while queue:
+        if len(visited) > SUBSEARCH_LIMIT:
+            return False
+
+        player, boxes = queue.popleft()
+        if not boxes & ~goals:
+            return False
+
+        reachable = compute_reachable_mask(player, boxes, level)
+        for box in level.cells(boxes):
+            for offset in offsets:
+                if not reachable >> (box - offset) & 1:
+                    continue
+                target = box + offset
+                if not floor >> target & 1 or boxes >> target & 1 or dead >> target & 1:
+                    continue
+                if not window >> target & 1:
+                    return False
+
+                new_boxes = boxes ^ (1 << box) | (1 << target)
+                if is_freeze_deadlock_mask(target, new_boxes, level, dead):
+                    continue
+
+                region = compute_reachable_mask(box, new_boxes, level)
+                state = ((region & -region).bit_length() - 1, new_boxes)
+                if state not in visited:
+                    visited.add(state)
+                    queue.append(state)
+
+    return True
+
+def read_patterns(path):
+    if not path.exists():
+        return []
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return []
+
+def load_deadlock_patterns(level, path, learning=True):
+    patterns = DeadlockPatterns(level, path, learning)
+    for pattern in read_patterns(path):
+        patterns._index(pattern)
+        patterns.learned.add(pattern)
+    return patterns
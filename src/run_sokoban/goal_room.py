@@ -0,0 +1,160 @@
+from collections import deque
+
+from .sokoban import DELTAS
+
+# Cuarto de metas: zona del mapa con al menos dos metas a la que solo se entra
+# por una puerta de una o dos celdas. Las cajas se empujan adentro siguiendo
+# un orden de llenado que nunca deja una meta bloqueada por otra ya ocupada.
+
+MAX_ROOM_GOALS = 12  # Con más metas la tabla de subconjuntos se vuelve demasiado grande
+
+class GoalRoom:
+    def __init__(self, entrance, cells, order, fillable):
+        self.entrance = entrance
+        self.cells = cells
+        self.order = order
+        self.fillable = fillable
+        self.goals = frozenset(order)
+        self.room_mask = 0
+        self.goal_mask = 0
+        self.fillable_masks = frozenset()
+
+    def __repr__(self):
+        return f"<GoalRoom entrance={sorted(self.entrance)} cells={len(self.cells)} goals={len(self.order)}>"
+
+    def compile(self, board):
+        # Versión en máscaras para el motor bitboard
+        self.room_mask = board.mask_of(self.cells)
+        self.goal_mask = board.mask_of(self.goals)
+        self.fillable_masks = frozenset(board.mask_of(filled) for filled in self.fillable)
+
+    def allows_push(self, source, target, boxes):
+        # Una caja solo entra al cuarto si las metas ya ocupadas adentro todavía
+        # permiten completar el llenado en algún orden. Cuenta el conjunto
+        # completo de metas ocupadas: un subconjunto no dice nada sobre si el
+        # cuarto se puede terminar de llenar.
+        if source in self.cells or target not in self.cells:
+            return True
+        return boxes & self.goals in self.fillable
+
+    def allows_push_mask(self, source, target, box_mask):
+        room = self.room_mask
+        if room >> source & 1 or not room >> target & 1:
+            return True
+        return box_mask & self.goal_mask in self.fillable_masks
+
+def find_goal_room(sokoban_map):
+    goals = sokoban_map.goals
+    box_cells = {box.pos for box in sokoban_map.boxes}
+    player = sokoban_map.player
+    interior = region(player, sokoban_map.floors - sokoban_map.walls)
+
+    doors = []
+    for r, c in sorted(interior):
+        doors.append(frozenset([(r, c)]))
+        doors.extend(frozenset([(r, c), other]) for other in ((r+1, c), (r, c+1)) if other in interior)
+
+    best = None
+    for entrance in doors:
+        if entrance & goals or entrance & box_cells:
+            continue
+        seen = set()
+        for r, c in entrance:
+            for dr, dc in DELTAS.values():
+                start = (r+dr, c+dc)
+                if start not in interior or start in entrance or start in seen:
+                    continue
+                cells = region(start, interior - entrance)
+                seen |= cells
+                if player in cells or cells & box_cells:
+                    continue
+                room_goals = cells & goals
+                if len(room_goals) < 2:
+                    continue
+                key = (-len(room_goals), len(cells), len(entrance))
+                if best is None or key < best[0]:
+                    best = (key, entrance, cells, room_goals)
+
+    if best is None:
+        return None
+
+    _, entrance, cells, room_goals = best
+    if len(room_goals) > MAX_ROOM_GOALS:
+        return None
+
+    fillable = fillable_sets(entrance, cells, room_goals, interior)
+    if frozenset() not in fillable:
+        return None
+
+    # Un orden de llenado concreto: siempre la primera meta que deja un conjunto llenable
+    order = []
+    filled = frozenset()
+    while filled != room_goals:
+        goal = min(goal for goal in room_goals - filled if filled | {goal} in fillable)
+        order.append(goal)
+        filled |= {goal}
+    return GoalRoom(entrance, cells, tuple(order), fillable)
+
+def fillable_sets(entrance, cells, room_goals, interior):
+    # Conjuntos de metas ocupadas desde los que se puede terminar de llenar el
+    # cuarto. Se arma hacia atrás: con todo lleno, F es llenable si alguna
+    # meta g se puede llenar con F ocupado y F + g ya es llenable.
+    fillable = {frozenset(room_goals)}
+    layer = [frozenset(room_goals)]
+    while layer:
+        next_layer = []
+        for full in layer:
+            for goal in full:
+                filled = full - {goal}
+                if filled in fillable:
+                    continue
+                if can_fill(goal, entrance, cells, interior - filled):
+                    fillable.add(filled)
+                    next_layer.append(filled)
+        layer = next_layer
+    return frozenset(fillable)
+
+def can_fill(goal, entrance, cells, free):
+    # Búsqueda de una sola caja que entra empujada desde afuera del cuarto;
+    # free son las celdas libres con las demás metas del cuarto ya ocupadas.
+    # La caja no necesita salir del cuarto, así que no pasa de la puerta.
+    box_cells = cells | entrance
+    starts = set()
+    for r, c in entrance:
+        for dr, dc in DELTAS.values():
+            outside = (r+dr, c+dc)
+            if outside in free and outside not in cells:
+                starts.add(((r, c), min(region(outside, free - {(r, c)}))))
+
+    visited = set(starts)
+    queue = deque(starts)
+    while queue:
+        box, player = queue.popleft()
+        if box == goal:
+            return True
+
+        reachable = region(player, free - {box})
+        for dr, dc in DELTAS.values():
+            push_from = (box[0]-dr, box[1]-dc)
+            target = (box[0]+dr, box[1]+dc)
+            if push_from not in reachable or target not in free or target not in box_cells:
+                continue
+            state = (target, min(region(box, free - {target})))
+            if state not in visited:
+                visited.add(state)
+                queue.append(state)
+
+    return False
+
+def region(start, cells):
+    # Componente conexa de start dentro de cells
+    found = set()
+    stack = [start]
+    while stack:
+        pos = stack.pop()
+        if pos in found or pos not in cells:
+            continue
+        found.add(pos)
+        r, c = pos
+        stack.extend(((r-1, c), (r+1, c), (r, c-1), (r, c+1)))
+    return frozenset(found)
@@ -0,0 +1,97 @@
+from collections import OrderedDict
+
+# Alcanzabilidad del jugador con máscaras de bits. Las celdas se numeran como
+# r * width + c (igual que en bitboard.py), así que un desplazamiento de 1 es
+# un paso horizontal y uno de width un paso vertical; la columna extra de
+# width evita que un desplazamiento pase de una fila a la siguiente.
+
+CACHE_SIZE = 50000  # Configuraciones de cajas recordadas
+
+class Reachability:
+    def __init__(self, walls, floors, player, cache_size=CACHE_SIZE):
+        self.width = max(c for _, c in walls | floors) + 2
+        self.floor_mask = self.flood_cells(player, walls, floors)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # La caché no se guarda junto al nivel compilado
+        state = self.__dict__.copy()
+        state["_cache"] = OrderedDict()
+        return state
+
+    def flood_cells(self, player, walls, floors):
+        # Piso interior: las celdas alcanzables desde el jugador sin cajas
+        mask = 0
+        stack = [player]
+        while stack:
+            pos = stack.pop()
+            # Primero se descartan paredes y celdas fuera del mapa: junto a la
+            # fila 0 un vecino tiene índice negativo y no tiene bit
+            if pos in walls or pos not in floors:
+                continue
+            bit = 1 << self.index(pos)
+            if mask & bit:
+                continue
+            mask |= bit
+            r, c = pos
+            stack.extend(((r-1, c), (r+1, c), (r, c-1), (r, c+1)))
+        return mask
+
+    def index(self, pos):
+        return pos[0] * self.width + pos[1]
+
+    def position(self, idx):
+        return divmod(idx, self.width)
+
+    def mask_of(self, positions):
+        mask = 0
+        for pos in positions:
+            mask |= 1 << self.index(pos)
+        return mask
+
+    def flood(self, start, box_mask):
+        # Todas las celdas de la frontera avanzan a la vez en las cuatro direcciones
+        free = self.floor_mask & ~box_mask
+        width = self.width
+        reach = (1 << start) & free
+        while True:
+            grown = (reach | reach << 1 | reach >> 1 | reach << width | reach >> width) & free
+            if grown == reach:
+                return reach
+            reach = grown
+
+    def region(self, start, box_mask):
+        # Cada configuración de cajas guarda las regiones ya calculadas: otro
+        # jugador en la misma región reutiliza la máscara sin volver a inundar
+        cache = self._cache
+        regions = cache.get(box_mask)
+        if regions is None:
+            regions = []
+            cache[box_mask] = regions
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(box_mask)
+
+        bit = 1 << start
+        for region in regions:
+            if region & bit:
+                self.hits += 1
+                return region
+
+        self.misses += 1
+        region = self.flood(start, box_mask)
+        if region:
+            regions.append(region)
+        return region
+
+    def clear(self):
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+def lowest_cell(mask):
+    return (mask & -mask).bit_length() - 1
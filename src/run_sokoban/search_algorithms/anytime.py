@@ -0,0 +1,124 @@
+import time
+import heapq
+import itertools
+from collections import Counter
+from ..arena import NodeArena
+from ..sokoban import move_cost, reconstruct_path
+from .utils import get_result, progress_event, run_steps
+from .budget import over_budget
+
+def anytime_astar(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, weight=3.0, weight_step=0.5,
+                  on_solution=None, budget=None):
+    return run_steps(anytime_astar_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, weight,
+                                         weight_step, on_solution, budget))
+
+def anytime_astar_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, weight=3.0, weight_step=0.5,
+                        on_solution=None, budget=None, progress=None):
+    start_time = time.time()
+    pruned = Counter()
+    goals = sokoban_map.goals
+    arena = NodeArena(sokoban_map)
+    keys = arena.keys
+    costs = arena.costs
+
+    # Estilo ARA*: se busca con f = g + w*h y cada vez que aparece una solución
+    # mejor se baja w. La frontera, los mejores g y los estados inconsistentes
+    # (mejorados después de expandirse) pasan a la siguiente vuelta, así que
+    # solo se reordena la frontera en lugar de empezar de cero. Todas las
+    # tablas usan la clave del estado en la arena.
+    root = arena.add(initial_state)
+    h_cache = {keys[root]: heuristic(initial_state, sokoban_map)}
+    best = {keys[root]: root}
+    open_nodes = {keys[root]}
+    closed = set()
+    incons = set()
+    frontier = []
+    counter = itertools.count()
+
+    solutions = []
+    upper = float("inf")
+    goal_node = None
+    nodes_expanded = 0
+    max_frontier = 1
+    stopped = None
+    next_report = 0
+
+    if initial_state.is_goal(goals):
+        return get_result(arena, root, 0, 1, start_time, success=True, solutions=[], weight=1.0, pruned=pruned)
+
+    while True:
+        # La frontera se rearma con el peso actual
+        frontier = [(costs[best[key]] + weight * h_cache[key], -costs[best[key]], next(counter), best[key])
+                    for key in open_nodes]
+        heapq.heapify(frontier)
+
+        while frontier and frontier[0][0] < upper:
+            _, _, _, node = heapq.heappop(frontier)
+            key = keys[node]
+            if best[key] != node or key not in open_nodes:
+                continue
+            open_nodes.discard(key)
+            closed.add(key)
+            nodes_expanded += 1
+            if progress and nodes_expanded >= next_report:
+                next_report = nodes_expanded + progress
+                yield progress_event(nodes_expanded, len(open_nodes), upper if goal_node is not None else None, start_time, weight=weight)
+
+            # Al agotarse el presupuesto queda la mejor solución encontrada hasta ahí
+            stopped = over_budget(budget, nodes_expanded, len(open_nodes), start_time)
+            if stopped:
+                break
+
+            for move, neighbor in neighbor_finder(arena.state(node), sokoban_map, dead_squares, pruned):
+                g = costs[node] + move_cost(move)
+                key = arena.key(neighbor)
+                known = best.get(key)
+                if known is not None and costs[known] <= g:
+                    continue
+
+                h = h_cache.get(key)
+                if h is None:
+                    h = heuristic(neighbor, sokoban_map)
+                    h_cache[key] = h
+                if g + h >= upper:
+                    continue
+
+                child = arena.add_key(key, node, move, g)
+                best[key] = child
+
+                if neighbor.is_goal(goals):
+                    upper = g
+                    goal_node = child
+                    solution = {
+                        "weight": weight,
+                        "cost": g,
+                        "time": time.time() - start_time,
+                        "nodes_expanded": nodes_expanded,
+                        "max_frontier": max_frontier,
+                        "solution": reconstruct_path(arena, child)
+                    }
+                    solutions.append(solution)
+                    if on_solution is not None:
+                        on_solution(solution)
+                    continue
+
+                if key in closed:
+                    incons.add(key)
+                else:
+                    open_nodes.add(key)
+                    heapq.heappush(frontier, (g + weight * h, -g, next(counter), child))
+            max_frontier = max(max_frontier, len(open_nodes) + len(incons))
+
+        if stopped is not None or weight <= 1.0:
+            break
+
+        # Siguiente vuelta: peso más bajo, los inconsistentes vuelven a la frontera
+        weight = max(1.0, weight - weight_step)
+        open_nodes |= incons
+        incons = set()
+        closed = set()
+        if not open_nodes:
+            break
+
+    return get_result(arena, goal_node, nodes_expanded, max_frontier, start_time, success=goal_node is not None,
+                      stopped=stopped, solutions=solutions, weight=weight, pruned=pruned)
\ No newline at end of file
@@ -1,38 +1,97 @@
 import time
-import heapq
-import itertools
-from ..sokoban import get_neighbors
-from .utils import get_result
+from collections import Counter
+from ..arena import NodeArena
+from ..sokoban import move_cost
+from .frontier import BucketQueue
+from .utils import get_result, progress_event, run_steps
+from .budget import over_budget
+from .checkpoint import checkpoint_stats
 
-def astar(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder):
+def astar(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, tie_break="high_g", budget=None,
+          checkpoint=None):
+    return run_steps(astar_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, tie_break, budget,
+                                 checkpoint))
+
+def astar_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, tie_break="high_g", budget=None,
+                checkpoint=None, progress=None):
     start_time = time.time()
+    pruned = Counter()
     goals = sokoban_map.goals
-    frontier = []
-    counter = itertools.count()
-    
-    heapq.heappush(frontier, (heuristic(initial_state, goals), next(counter), initial_state))
-    explored = set()
-    max_frontier = 1
-    nodes_expanded = 0
+    frontier = BucketQueue(tie_break)
+    saved = checkpoint.load("astar", sokoban_map) if checkpoint is not None else None
+
+    if saved is None:
+        arena = NodeArena(sokoban_map)
+        # Mejor g de cada estado (por clave) que sigue en la frontera; una
+        # entrada del balde con un g peor quedó obsoleta y se descarta al sacarla
+        root = arena.add(initial_state)
+        open_g = {arena.keys[root]: 0}
+        frontier.push(root, heuristic(initial_state, sokoban_map), 0)
+        explored = set()
+        max_frontier = 1
+        nodes_expanded = 0
+    else:
+        # Reanudación: open_g es el menor g de cada estado de la frontera todavía sin explorar
+        arena = saved["arena"]
+        explored = saved["explored"]
+        open_g = {}
+        for node, f, g in saved["frontier"]:
+            frontier.push(node, f, g)
+            key = arena.keys[node]
+            if key not in explored and open_g.get(key, arena.costs[node] + 1) > arena.costs[node]:
+                open_g[key] = arena.costs[node]
+        max_frontier = saved["max_frontier"]
+        nodes_expanded = saved["nodes_expanded"]
+        start_time -= saved["elapsed"]
+        pruned.update(saved["pruned"])
+    keys = arena.keys
+    costs = arena.costs
+    next_report = 0
 
     while frontier:
-        _, _, state = heapq.heappop(frontier)
+        if progress and nodes_expanded >= next_report:
+            next_report = nodes_expanded + progress
+            yield progress_event(nodes_expanded, len(open_g), frontier.min_f(), start_time)
+        # El presupuesto y el checkpoint se miran antes de sacar un nodo, con la frontera completa
+        stopped = over_budget(budget, nodes_expanded, len(open_g), start_time)
+        if checkpoint is not None and (stopped or checkpoint.due(nodes_expanded)):
+            checkpoint.save("astar", arena, frontier.entries(), explored, nodes_expanded, max_frontier, start_time,
+                            pruned)
+        if stopped:
+            return get_result(arena, None, nodes_expanded, max_frontier, start_time, success=False, stopped=stopped,
+                              pruned=pruned, **checkpoint_stats(checkpoint))
+
+        node = frontier.pop()
+        key = keys[node]
 
-        if state in explored:
+        if open_g.get(key) != costs[node]:
             continue
-        explored.add(state)
+        del open_g[key]
+        explored.add(key)
         nodes_expanded += 1
+        state = arena.state(node)
 
         if state.is_goal(goals):
-            elapsed = time.time() - start_time
-            return get_result(state, nodes_expanded, max_frontier, start_time, success=True)
-
-        for neighbor in neighbor_finder(state, sokoban_map, dead_squares):
-            if neighbor not in explored:
-                g = neighbor.cost
-                h = heuristic(neighbor, goals)
-                heapq.heappush(frontier, (g + h, next(counter), neighbor))
-                max_frontier = max(max_frontier, len(frontier))
-
-    elapsed = time.time() - start_time
-    return get_result(None, nodes_expanded, max_frontier, start_time, success=False)
\ No newline at end of file
+            if checkpoint is not None:
+                checkpoint.finish()
+            return get_result(arena, node, nodes_expanded, max_frontier, start_time, success=True,
+                              pruned=pruned, **checkpoint_stats(checkpoint))
+
+        for move, neighbor in neighbor_finder(state, sokoban_map, dead_squares, pruned):
+            key = arena.key(neighbor)
+            if key in explored:
+                continue
+            g = costs[node] + move_cost(move)
+            queued = open_g.get(key)
+            if queued is not None and queued <= g:
+                continue
+
+            open_g[key] = g
+            frontier.push(arena.add_key(key, node, move, g), g + heuristic(neighbor, sokoban_map), g)
+            if len(open_g) > max_frontier:
+                max_frontier = len(open_g)
+
+    if checkpoint is not None:
+        checkpoint.finish()
+    return get_result(arena, None, nodes_expanded, max_frontier, start_time, success=False, pruned=pruned,
+                      **checkpoint_stats(checkpoint))
\ No newline at end of file
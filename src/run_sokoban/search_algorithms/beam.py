@@ -0,0 +1,133 @@
+import sys
+import time
+from collections import deque
+from collections import Counter
+from ..arena import NodeArena
+from ..sokoban import move_cost
+from .utils import get_result, progress_event, run_steps
+from .budget import over_budget
+
+BEAM_WIDTH = 500    # Estados que sobreviven en cada capa
+MAX_DEPTH = 5000    # Capas máximas: al olvidar estados viejos la búsqueda podría dar vueltas
+NODE_OVERHEAD = 120 # Bytes aproximados por nodo en la arena y la tabla de vistos, además de la clave
+
+def beam_search(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, width=BEAM_WIDTH,
+                node_cap=None, byte_cap=None, budget=None):
+    return run_steps(beam_search_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, width,
+                                       node_cap, byte_cap, budget))
+
+def beam_search_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, width=BEAM_WIDTH,
+                      node_cap=None, byte_cap=None, budget=None, progress=None):
+    start_time = time.time()
+    pruned = Counter()
+    goals = sokoban_map.goals
+    arena = NodeArena(sokoban_map)
+    root = arena.add(initial_state)
+    if initial_state.is_goal(goals):
+        return get_result(arena, root, 0, 1, start_time, success=True, cap_prunings=0, beam_prunings=0, pruned=pruned)
+
+    # Un tope en bytes se traduce a nodos con el tamaño estimado de un estado
+    if byte_cap is not None:
+        by_bytes = byte_cap // node_bytes(arena.keys[root])
+        node_cap = by_bytes if node_cap is None else min(node_cap, by_bytes)
+
+    # Búsqueda por capas: de todos los sucesores de una capa solo siguen los
+    # width de menor f = g + h. Los vistos se guardan por capa para poder
+    # olvidar primero los más viejos si la memoria no alcanza. Los vistos y
+    # los candidatos se guardan por clave del estado en la arena.
+    layer = [root]
+    seen = {arena.keys[root]}
+    seen_layers = deque([[arena.keys[root]]])
+    nodes_expanded = 0
+    max_frontier = 1
+    cap_prunings = 0
+    beam_prunings = 0
+    best_f = heuristic(initial_state, sokoban_map)
+    next_report = 0
+
+    for _ in range(MAX_DEPTH):
+        candidates = {}
+        for node in layer:
+            if progress and nodes_expanded >= next_report:
+                next_report = nodes_expanded + progress
+                yield progress_event(nodes_expanded, len(layer), best_f, start_time)
+            stopped = over_budget(budget, nodes_expanded, len(layer), start_time)
+            if stopped:
+                return get_result(arena, None, nodes_expanded, max_frontier, start_time, success=False, stopped=stopped,
+                                  cap_prunings=cap_prunings, beam_prunings=beam_prunings, pruned=pruned)
+            nodes_expanded += 1
+            g_node = arena.costs[node]
+            for move, neighbor in neighbor_finder(arena.state(node), sokoban_map, dead_squares, pruned):
+                key = arena.key(neighbor)
+                if key in seen:
+                    continue
+                g = g_node + move_cost(move)
+                if neighbor.is_goal(goals):
+                    child = arena.add_key(key, node, move, g)
+                    return get_result(arena, child, nodes_expanded, max_frontier, start_time, success=True,
+                                      cap_prunings=cap_prunings, beam_prunings=beam_prunings, pruned=pruned)
+                known = candidates.get(key)
+                if known is None or g < known[1]:
+                    candidates[key] = (g + heuristic(neighbor, sokoban_map), g, node, move)
+
+        if not candidates:
+            break
+
+        # Menor f primero y, a igual f, el más profundo
+        ranked = sorted(candidates.items(), key=lambda item: (item[1][0], -item[1][1]))
+        best_f = ranked[0][1][0]
+        if len(ranked) > width:
+            beam_prunings += len(ranked) - width
+            ranked = ranked[:width]
+
+        translate = None
+        if node_cap is not None:
+            # Cada estado nuevo ocupa un nodo de la arena y una entrada de vistos
+            if len(arena) + len(seen) + 2 * len(ranked) > node_cap:
+                cap_prunings += 1
+                while len(seen_layers) > 1 and len(arena) + len(seen) + 2 * len(ranked) > node_cap:
+                    for key in seen_layers.popleft():
+                        seen.discard(key)
+                if len(arena) + len(seen) + 2 * len(ranked) > node_cap:
+                    arena, compacted = compact(arena, layer)
+                    translate = dict(zip(layer, compacted))
+                room = max(0, (node_cap - len(arena) - len(seen)) // 2)
+                if len(ranked) > room:
+                    ranked = ranked[:room]
+                if not ranked:
+                    break
+
+        next_layer = []
+        for key, (_, g, parent, move) in ranked:
+            if translate is not None:
+                parent = translate[parent]
+            next_layer.append(arena.add_key(key, parent, move, g))
+            seen.add(key)
+        seen_layers.append([key for key, _ in ranked])
+        layer = next_layer
+        max_frontier = max(max_frontier, len(layer))
+
+    return get_result(arena, None, nodes_expanded, max_frontier, start_time, success=False,
+                      cap_prunings=cap_prunings, beam_prunings=beam_prunings, pruned=pruned)
+
+def compact(arena, layer):
+    # Nueva arena solo con los ancestros de la capa actual
+    compacted = NodeArena(arena.sokoban_map)
+    remap = {}
+    new_layer = []
+    for node in layer:
+        chain = []
+        current = node
+        while current >= 0 and current not in remap:
+            chain.append(current)
+            current = arena.parents[current]
+        parent = remap[current] if current >= 0 else -1
+        for old in reversed(chain):
+            parent = compacted.add_key(arena.keys[old], parent, arena.move(old), arena.costs[old])
+            remap[old] = parent
+        new_layer.append(remap[node])
+    return compacted, new_layer
+
+def node_bytes(key):
+    # Estimación gruesa: la clave del estado más la contabilidad por nodo
+    return sys.getsizeof(key) + NODE_OVERHEAD
\ No newline at end of file
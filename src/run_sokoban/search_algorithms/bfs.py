@@ -1,27 +1,70 @@
 import time
-from collections import deque
-from ..sokoban import get_neighbors
-from .utils import get_result
+from collections import Counter
+from ..arena import NodeArena
+from ..sokoban import move_cost
+from .frontier import Frontier
+from .utils import get_result, progress_event, run_steps
+from .budget import over_budget
+from .checkpoint import checkpoint_stats
 
-def bfs(initial_state, goals, sokoban_map, dead_squares, neighbor_finder):
+def bfs(initial_state, goals, sokoban_map, dead_squares, neighbor_finder, budget=None, checkpoint=None):
+    return run_steps(bfs_steps(initial_state, goals, sokoban_map, dead_squares, neighbor_finder, budget, checkpoint))
+
+def bfs_steps(initial_state, goals, sokoban_map, dead_squares, neighbor_finder, budget=None, checkpoint=None,
+              progress=None):
     start_time = time.time()
-    frontier = deque([initial_state])
-    explored = set()
-    max_frontier = 1
-    nodes_expanded = 0
+    pruned = Counter()
+    frontier = Frontier()
+    saved = checkpoint.load("bfs", sokoban_map) if checkpoint is not None else None
+
+    if saved is None:
+        arena = NodeArena(sokoban_map)
+        root = arena.add(initial_state)
+        if initial_state.is_goal(goals):
+            return get_result(arena, root, 0, 1, start_time, success=True, pruned=pruned)
+        frontier.push(root, arena.keys[root])
+        explored = set()
+        nodes_expanded = 0
+    else:
+        arena = saved["arena"]
+        for node in saved["frontier"]:
+            frontier.push(node, arena.keys[node])
+        frontier.max_size = saved["max_frontier"]
+        explored = saved["explored"]
+        nodes_expanded = saved["nodes_expanded"]
+        start_time -= saved["elapsed"]
+        pruned.update(saved["pruned"])
 
+    next_report = 0
     while frontier:
-        state = frontier.popleft()
-        if state.is_goal(goals):
-            elapsed = time.time() - start_time
-            return get_result(state, nodes_expanded, max_frontier, start_time, success=True)
+        if progress and nodes_expanded >= next_report:
+            next_report = nodes_expanded + progress
+            yield progress_event(nodes_expanded, len(frontier), arena.costs[frontier.peek()], start_time)
+        stopped = over_budget(budget, nodes_expanded, len(frontier), start_time)
+        if checkpoint is not None and (stopped or checkpoint.due(nodes_expanded)):
+            checkpoint.save("bfs", arena, frontier.nodes(), explored, nodes_expanded, frontier.max_size, start_time,
+                            pruned)
+        if stopped:
+            return get_result(arena, None, nodes_expanded, frontier.max_size, start_time, success=False, stopped=stopped,
+                              pruned=pruned, **checkpoint_stats(checkpoint))
 
-        explored.add(state)
+        # Explorados y frontera guardan claves; el estado se arma solo para expandirlo
+        node, key = frontier.pop()
+        explored.add(key)
         nodes_expanded += 1
-        for neighbor in neighbor_finder(state, sokoban_map, dead_squares):
-            if neighbor not in explored and neighbor not in frontier:
-                frontier.append(neighbor)
-                max_frontier = max(max_frontier, len(frontier))
+        for move, neighbor in neighbor_finder(arena.state(node), sokoban_map, dead_squares, pruned):
+            key = arena.key(neighbor)
+            if key not in explored and key not in frontier:
+                child = arena.add_key(key, node, move, arena.costs[node] + move_cost(move))
+                # El objetivo se prueba al generar: ahorra expandir toda la capa siguiente
+                if neighbor.is_goal(goals):
+                    if checkpoint is not None:
+                        checkpoint.finish()
+                    return get_result(arena, child, nodes_expanded, frontier.max_size, start_time, success=True,
+                                      pruned=pruned, **checkpoint_stats(checkpoint))
+                frontier.push(child, key)
 
-    elapsed = time.time() - start_time
-    return get_result(None, nodes_expanded, max_frontier, start_time, success=False)
\ No newline at end of file
+    if checkpoint is not None:
+        checkpoint.finish()
+    return get_result(arena, None, nodes_expanded, frontier.max_size, start_time, success=False,
+                      pruned=pruned, **checkpoint_stats(checkpoint))
\ No newline at end of file
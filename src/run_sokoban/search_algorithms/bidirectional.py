@@ -0,0 +1,101 @@
+import time
+from collections import Counter
+from ..arena import NodeArena
+from ..sokoban import move_cost
+from .utils import get_result, progress_event, run_steps
+from .budget import over_budget
+
+def bidirectional(initial_state, sokoban_map, dead_squares, neighbor_finder, pull_finder, budget=None):
+    return run_steps(bidirectional_steps(initial_state, sokoban_map, dead_squares, neighbor_finder, pull_finder, budget))
+
+def bidirectional_steps(initial_state, sokoban_map, dead_squares, neighbor_finder, pull_finder, budget=None, progress=None):
+    start_time = time.time()
+    pruned = Counter()
+
+    # Hacia adelante con empujes desde el inicio; hacia atrás con tirones desde
+    # cada estado resuelto (uno por región del jugador alrededor de las metas)
+    # Los vistos de cada lado van de la clave del estado a su nodo
+    forward = NodeArena(sokoban_map)
+    backward = NodeArena(sokoban_map)
+    root = forward.add(initial_state)
+    forward_seen = {forward.keys[root]: root}
+    backward_seen = {}
+    for state in sokoban_map.goal_states():
+        node = backward.add(state)
+        backward_seen[backward.keys[node]] = node
+
+    if forward.keys[root] in backward_seen:
+        arena, node = _joined_path(forward, root, backward, backward_seen[forward.keys[root]])
+        return get_result(arena, node, 0, 1, start_time, success=True, pruned=pruned)
+
+    forward_layer = list(forward_seen.values())
+    backward_layer = list(backward_seen.values())
+    max_frontier = len(forward_layer) + len(backward_layer)
+    nodes_expanded = 0
+    next_report = 0
+
+    while forward_layer and backward_layer:
+        # Se expande por capas el lado con la frontera más chica
+        if len(forward_layer) <= len(backward_layer):
+            arena, seen, other_seen, finder = forward, forward_seen, backward_seen, neighbor_finder
+            layer = forward_layer
+        else:
+            arena, seen, other_seen, finder = backward, backward_seen, forward_seen, pull_finder
+            layer = backward_layer
+
+        next_layer = []
+        for node in layer:
+            nodes_expanded += 1
+            if progress and nodes_expanded >= next_report:
+                # Largo mínimo de una solución: la profundidad de las dos capas
+                next_report = nodes_expanded + progress
+                depth = forward.costs[forward_layer[0]] + backward.costs[backward_layer[0]]
+                yield progress_event(nodes_expanded, len(forward_layer) + len(backward_layer) + len(next_layer), depth,
+                                     start_time)
+            stopped = over_budget(budget, nodes_expanded, len(forward_layer) + len(backward_layer) + len(next_layer), start_time)
+            if stopped:
+                return get_result(forward, None, nodes_expanded, max_frontier, start_time, success=False, stopped=stopped, pruned=pruned)
+            for move, neighbor in finder(arena.state(node), sokoban_map, dead_squares, pruned):
+                key = arena.key(neighbor)
+                if key in seen:
+                    continue
+                child = arena.add_key(key, node, move, arena.costs[node] + move_cost(move))
+                seen[key] = child
+                # Las búsquedas se encuentran cuando un estado ya fue visto por la otra
+                if key in other_seen:
+                    if arena is forward:
+                        joined = _joined_path(forward, child, backward, backward_seen[key])
+                    else:
+                        joined = _joined_path(forward, forward_seen[key], backward, child)
+                    return get_result(*joined, nodes_expanded, max_frontier, start_time, success=True, pruned=pruned)
+                next_layer.append(child)
+
+        if arena is forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+        max_frontier = max(max_frontier, len(forward_layer) + len(backward_layer))
+
+    return get_result(forward, None, nodes_expanded, max_frontier, start_time, success=False, pruned=pruned)
+
+def _joined_path(forward, forward_node, backward, backward_node):
+    # Un único camino: los empujes hasta el encuentro y después los tirones
+    # recorridos desde el encuentro hasta la meta, ya guardados como empujes
+    chain = []
+    node = forward_node
+    while node >= 0:
+        chain.append(node)
+        node = forward.parents[node]
+    chain.reverse()
+
+    arena = NodeArena(forward.sokoban_map)
+    joined = -1
+    for node in chain:
+        joined = arena.add_key(forward.keys[node], joined, forward.move(node), forward.costs[node])
+
+    node = backward_node
+    while backward.parents[node] >= 0:
+        move = backward.move(node)
+        node = backward.parents[node]
+        joined = arena.add_key(backward.keys[node], joined, move, arena.costs[joined] + move_cost(move))
+    return arena, joined
\ No newline at end of file
@@ -0,0 +1,41 @@
+import time
+
+CHECK_INTERVAL = 1024  # Expansiones entre consultas al reloj y a la marca de cancelación
+
+# Límites compartidos por todas las búsquedas. Los topes de nodos y de
+# frontera son comparaciones de enteros y se miran en cada expansión; el reloj
+# y la marca de cancelación (que puede ser un Event de otro proceso) cuestan
+# más y se consultan cada interval expansiones.
+
+class SearchBudget:
+    def __init__(self, time_limit=None, max_nodes=None, max_frontier=None, cancel=None, interval=CHECK_INTERVAL):
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.max_frontier = max_frontier
+        self.cancel = cancel
+        self.interval = interval
+
+    def __repr__(self):
+        return (f"<SearchBudget time={self.time_limit} nodes={self.max_nodes} "
+                f"frontier={self.max_frontier} cancel={self.cancel is not None}>")
+
+    def check(self, nodes_expanded, frontier_size, start_time):
+        # None mientras se pueda seguir; si no, el motivo del corte
+        if self.max_nodes is not None and nodes_expanded >= self.max_nodes:
+            return "nodes"
+        if self.max_frontier is not None and frontier_size > self.max_frontier:
+            return "frontier"
+        if nodes_expanded % self.interval:
+            return None
+        return self.poll(start_time)
+
+    def poll(self, start_time):
+        # Las consultas caras, sin esperar al intervalo
+        if self.cancel is not None and self.cancel.is_set():
+            return "cancel"
+        if self.time_limit is not None and time.time() - start_time >= self.time_limit:
+            return "time"
+        return None
+
+def over_budget(budget, nodes_expanded, frontier_size, start_time):
+    return None if budget is None else budget.check(nodes_expanded, frontier_size, start_time)
\ No newline at end of file
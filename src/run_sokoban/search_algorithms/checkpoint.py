@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import zipfile
+import tempfile
+import numpy as np
+from ..arena import NodeArena
+
+CHECKPOINT_INTERVAL = 300.0  # Segundos entre checkpoints
+CLOCK_INTERVAL = 4096        # Expansiones entre consultas al reloj
+CHECKPOINT_VERSION = 2
+WORD = (1 << 64) - 1
+
+# Checkpoint de una búsqueda larga: la arena (las claves de los estados
+# partidas en palabras de 64 bits, y las columnas de padres, movimientos y
+# costos), la frontera como ids de nodo, las claves exploradas y los contadores. Va en un .npz sin pickle con una cabecera JSON;
+# se escribe en un temporal y se reemplaza de forma atómica, así que un corte
+# en medio de la escritura deja el checkpoint anterior intacto.
+
+class Checkpointer:
+    def __init__(self, path, signature="", interval=CHECKPOINT_INTERVAL, resume=False):
+        self.path = path
+        self.signature = signature
+        self.interval = interval
+        self.resume = resume
+        self.writes = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self._last = time.time()
+
+    def __repr__(self):
+        return f"<Checkpointer {self.path} every={self.interval}s resume={self.resume}>"
+
+    def due(self, nodes_expanded):
+        return nodes_expanded % CLOCK_INTERVAL == 0 and time.time() - self._last >= self.interval
+
+    def stats(self):
+        return {"checkpoint_writes": self.writes, "checkpoint_time": self.seconds, "checkpoint_bytes": self.bytes}
+
+    def save(self, algorithm, arena, frontier, explored, nodes_expanded, max_frontier, start_time, pruned):
+        began = time.time()
+        parents, move_codes, costs, move_table = arena.columns()
+        header = {
+            "version": CHECKPOINT_VERSION,
+            "signature": self.signature,
+            "algorithm": algorithm,
+            "nodes_expanded": nodes_expanded,
+            "max_frontier": max_frontier,
+            "elapsed": began - start_time,
+            "pruned": dict(pruned),
+            "moves": move_table
+        }
+        words = key_words(arena.sokoban_map)
+        arrays = {
+            "header": np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+            "keys": encode_keys(arena.keys, words),
+            "parents": np.array(parents, dtype=np.int64),
+            "move_codes": np.array(move_codes, dtype=np.int64),
+            "costs": np.array(costs, dtype=np.int64),
+            "frontier": np.array(frontier, dtype=np.int64),
+            "explored": encode_keys(explored, words)
+        }
+
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        self.writes += 1
+        self.bytes = os.path.getsize(self.path)
+        self._last = time.time()
+        self.seconds += self._last - began
+
+    def load(self, algorithm, sokoban_map):
+        # None si no hay que reanudar o si el checkpoint es de otra búsqueda
+        if not self.resume or not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                header = json.loads(data["header"].tobytes().decode("utf-8"))
+                if (header["version"], header["signature"], header["algorithm"]) != (CHECKPOINT_VERSION, self.signature, algorithm):
+                    return None
+                arena = NodeArena.from_columns(sokoban_map, decode_keys(data["keys"]),
+                                               data["parents"].tolist(), data["move_codes"].tolist(), data["costs"].tolist(),
+                                               [as_tuple(move) for move in header["moves"]])
+                return {
+                    "arena": arena,
+                    "frontier": data["frontier"].tolist(),
+                    "explored": set(decode_keys(data["explored"])),
+                    "nodes_expanded": header["nodes_expanded"],
+                    "max_frontier": header["max_frontier"],
+                    "elapsed": header["elapsed"],
+                    "pruned": header["pruned"]
+                }
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # Un archivo truncado o dañado se ignora: la búsqueda empieza de cero
+            return None
+
+    def finish(self):
+        # Una búsqueda terminada no se reanuda
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def checkpoint_stats(checkpoint):
+    return {} if checkpoint is None else checkpoint.stats()
+
+def key_words(sokoban_map):
+    # Palabras de 64 bits que ocupa una clave de NodeArena: la máscara de piso más la celda del jugador
+    bits = sokoban_map.reachability.floor_mask.bit_length()
+    return max(1, (bits + bits.bit_length() + 63) // 64)
+
+def encode_keys(keys, words):
+    rows = [[(key >> (64 * i)) & WORD for i in range(words)] for key in keys]
+    return np.array(rows, dtype=np.uint64).reshape(-1, words)
+
+def decode_keys(rows):
+    keys = []
+    for row in rows.tolist():
+        key = 0
+        for i, word in enumerate(row):
+            key |= word << (64 * i)
+        keys.append(key)
+    return keys
+
+def as_tuple(move):
+    # JSON devuelve listas: los movimientos y las posiciones vuelven a ser tuplas
+    return tuple(as_tuple(part) for part in move) if isinstance(move, list) else move
\ No newline at end of file
@@ -1,27 +1,43 @@
 import time
-from collections import deque
-from ..sokoban import get_neighbors
-from .utils import get_result
+from collections import Counter
+from ..arena import NodeArena
+from ..sokoban import move_cost
+from .frontier import Frontier
+from .utils import get_result, progress_event, run_steps
+from .budget import over_budget
 
-def dfs(initial_state, goals, sokoban_map, dead_squares, neighbor_finder):
+def dfs(initial_state, goals, sokoban_map, dead_squares, neighbor_finder, budget=None):
+    return run_steps(dfs_steps(initial_state, goals, sokoban_map, dead_squares, neighbor_finder, budget))
+
+def dfs_steps(initial_state, goals, sokoban_map, dead_squares, neighbor_finder, budget=None, progress=None):
     start_time = time.time()
-    frontier = [initial_state]
+    pruned = Counter()
+    arena = NodeArena(sokoban_map)
+    frontier = Frontier(lifo=True)
+    root = arena.add(initial_state)
+    frontier.push(root, arena.keys[root])
     explored = set()
-    max_frontier = 1
     nodes_expanded = 0
+    next_report = 0
 
     while frontier:
-        state = frontier.pop()
+        if progress and nodes_expanded >= next_report:
+            next_report = nodes_expanded + progress
+            yield progress_event(nodes_expanded, len(frontier), arena.costs[frontier.peek()], start_time)
+        stopped = over_budget(budget, nodes_expanded, len(frontier), start_time)
+        if stopped:
+            return get_result(arena, None, nodes_expanded, frontier.max_size, start_time, success=False, stopped=stopped, pruned=pruned)
+
+        node, key = frontier.pop()
+        state = arena.state(node)
         if state.is_goal(goals):
-            elapsed = time.time() - start_time
-            return get_result(state, nodes_expanded, max_frontier, start_time, success=True)
+            return get_result(arena, node, nodes_expanded, frontier.max_size, start_time, success=True, pruned=pruned)
 
-        explored.add(state)
+        explored.add(key)
         nodes_expanded += 1
-        for neighbor in neighbor_finder(state, sokoban_map, dead_squares):
-            if neighbor not in explored and neighbor not in frontier:
-                frontier.append(neighbor)
-                max_frontier = max(max_frontier, len(frontier))
+        for move, neighbor in neighbor_finder(state, sokoban_map, dead_squares, pruned):
+            key = arena.key(neighbor)
+            if key not in explored and key not in frontier:
+                frontier.push(arena.add_key(key, node, move, arena.costs[node] + move_cost(move)), key)
 
-    elapsed = time.time() - start_time
-    return get_result(None, nodes_expanded, max_frontier, start_time, success=False)
\ No newline at end of file
+    return get_result(arena, None, nodes_expanded, frontier.max_size, start_time, success=False, pruned=pruned)
\ No newline at end of file
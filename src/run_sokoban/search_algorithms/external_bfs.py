@@ -0,0 +1,213 @@
+import os
+import time
+import heapq
+import tempfile
+import numpy as np
+from collections import Counter
+from ..arena import NodeArena
+from ..sokoban import move_cost
+from .utils import get_result, progress_event, run_steps
+from .budget import over_budget
+
+RUN_SIZE = 1 << 16     # Sucesores que se juntan en memoria antes de ordenarlos y bajarlos a disco
+BLOCK_SIZE = 4096      # Registros por lectura o escritura de un archivo
+DUPLICATE_LAYERS = 2   # Capas anteriores contra las que se eliminan duplicados
+WORD = (1 << 64) - 1
+
+# BFS en memoria externa: cada capa es un archivo de registros de ancho fijo
+# (palabras de 64 bits de la máscara de cajas, celda del jugador, índice del
+# padre en la capa anterior y código del movimiento). Los sucesores se juntan
+# en corridas ordenadas y una mezcla externa las une, descarta los repetidos y
+# los que ya están en las capas anteriores. En memoria solo quedan una corrida
+# y un bloque por archivo abierto.
+#
+# Con empujes el grafo no es simétrico, así que un estado puede reaparecer
+# más atrás de DUPLICATE_LAYERS capas: se vuelve a expandir, la profundidad
+# de la solución no cambia, pero en un nivel sin solución la búsqueda solo
+# termina por presupuesto. duplicate_layers=None compara contra todas.
+
+def external_bfs(initial_state, goals, sokoban_map, dead_squares, neighbor_finder, work_dir=None, run_size=RUN_SIZE,
+                 duplicate_layers=DUPLICATE_LAYERS, budget=None):
+    return run_steps(external_bfs_steps(initial_state, goals, sokoban_map, dead_squares, neighbor_finder, work_dir,
+                                        run_size, duplicate_layers, budget))
+
+def external_bfs_steps(initial_state, goals, sokoban_map, dead_squares, neighbor_finder, work_dir=None, run_size=RUN_SIZE,
+                       duplicate_layers=DUPLICATE_LAYERS, budget=None, progress=None):
+    start_time = time.time()
+    pruned = Counter()
+    if initial_state.is_goal(goals):
+        arena = NodeArena(sokoban_map)
+        return get_result(arena, arena.add(initial_state), 0, 1, start_time, success=True, bytes_read=0, bytes_written=0, pruned=pruned)
+
+    with tempfile.TemporaryDirectory(prefix="external_bfs_", dir=work_dir) as directory:
+        store = LayerStore(directory, sokoban_map)
+        layers = [store.write_layer([store.record(initial_state, 0, None)])]
+        nodes_expanded = 0
+        max_frontier = 1
+        stopped = None
+        next_report = 0
+
+        while layers[-1][1]:
+            runs = []
+            buffer = []
+            for index, row in enumerate(store.rows(layers[-1][0])):
+                stopped = over_budget(budget, nodes_expanded, layers[-1][1], start_time)
+                if stopped:
+                    break
+                if progress and nodes_expanded >= next_report:
+                    next_report = nodes_expanded + progress
+                    yield progress_event(nodes_expanded, layers[-1][1], len(layers) - 1, start_time,
+                                         bytes_read=store.bytes_read, bytes_written=store.bytes_written)
+                state = store.state(row)
+                nodes_expanded += 1
+                for move, neighbor in neighbor_finder(state, sokoban_map, dead_squares, pruned):
+                    record = store.record(neighbor, index, move)
+                    # El objetivo se prueba al generar, igual que en bfs
+                    if neighbor.is_goal(goals):
+                        arena, node = store.trace(layers, record)
+                        return get_result(arena, node, nodes_expanded, max_frontier, start_time, success=True,
+                                          bytes_read=store.bytes_read, bytes_written=store.bytes_written, pruned=pruned)
+                    buffer.append(record)
+                    if len(buffer) >= run_size:
+                        runs.append(store.write_run(buffer))
+                        buffer = []
+            if stopped:
+                break
+            if buffer:
+                runs.append(store.write_run(buffer))
+
+            previous = layers if duplicate_layers is None else layers[-duplicate_layers:]
+            layers.append(store.merge(runs, [path for path, _ in previous]))
+            for path in runs:
+                os.remove(path)
+            max_frontier = max(max_frontier, layers[-1][1])
+
+        return get_result(NodeArena(sokoban_map), None, nodes_expanded, max_frontier, start_time, success=False,
+                          stopped=stopped, bytes_read=store.bytes_read, bytes_written=store.bytes_written, pruned=pruned)
+
+class LayerStore:
+    def __init__(self, directory, sokoban_map):
+        self.directory = directory
+        self.sokoban_map = sokoban_map
+        # Palabras de 64 bits que necesita la máscara de cajas; la clave de orden
+        # es la máscara más el jugador, después van el padre y el movimiento
+        self.words = max(1, (sokoban_map.reachability.floor_mask.bit_length() + 63) // 64)
+        self.key_size = self.words + 1
+        self.width = self.words + 3
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.files = 0
+        # Los movimientos distintos son pocos: se guardan como código, como en NodeArena
+        self._move_table = []
+        self._move_index = {}
+
+    def record(self, state, parent, move):
+        code = self._move_index.get(move)
+        if code is None:
+            code = len(self._move_table)
+            self._move_index[move] = code
+            self._move_table.append(move)
+        player, box_mask = self.sokoban_map.encode_state(state)
+        return tuple((box_mask >> (64 * i)) & WORD for i in range(self.words)) + (player, parent, code)
+
+    def state(self, row):
+        box_mask = 0
+        for i in range(self.words):
+            box_mask |= row[i] << (64 * i)
+        return self.sokoban_map.decode_state(row[self.words], box_mask)
+
+    def _path(self, kind):
+        self.files += 1
+        return os.path.join(self.directory, f"{kind}_{self.files}.bin")
+
+    def _write(self, f, block):
+        data = np.array(block, dtype=np.uint64)
+        data.tofile(f)
+        self.bytes_written += data.nbytes
+
+    def write_run(self, records):
+        # Corrida ordenada por clave y sin repetidos (queda el primer padre visto)
+        records.sort(key=lambda record: record[:self.key_size])
+        unique = [records[0]]
+        for record in records[1:]:
+            if record[:self.key_size] != unique[-1][:self.key_size]:
+                unique.append(record)
+        path = self._path("run")
+        with open(path, "wb") as f:
+            self._write(f, unique)
+        return path
+
+    def write_layer(self, records):
+        path = self._path("layer")
+        with open(path, "wb") as f:
+            self._write(f, records)
+        return path, len(records)
+
+    def rows(self, path):
+        # Lectura por bloques sobre un memmap: el archivo nunca se carga entero
+        if not os.path.getsize(path):
+            return
+        data = np.memmap(path, dtype=np.uint64, mode="r").reshape(-1, self.width)
+        for start in range(0, len(data), BLOCK_SIZE):
+            block = data[start:start + BLOCK_SIZE]
+            self.bytes_read += block.nbytes
+            for row in block.tolist():
+                yield tuple(row)
+
+    def row(self, path, index):
+        data = np.memmap(path, dtype=np.uint64, mode="r").reshape(-1, self.width)
+        self.bytes_read += data[index].nbytes
+        return tuple(data[index].tolist())
+
+    def merge(self, runs, previous):
+        # Mezcla de k vías de las corridas; en paralelo se avanza sobre cada capa
+        # anterior (también ordenada) para descartar lo que ya se visitó
+        key_size = self.key_size
+        merged = heapq.merge(*(self.rows(path) for path in runs), key=lambda row: row[:key_size])
+        seen = [self.rows(path) for path in previous]
+        heads = [next(rows, None) for rows in seen]
+
+        path = self._path("layer")
+        count = 0
+        last = None
+        block = []
+        with open(path, "wb") as f:
+            for row in merged:
+                key = row[:key_size]
+                if key == last:
+                    continue
+                last = key
+                duplicate = False
+                for i, rows in enumerate(seen):
+                    while heads[i] is not None and heads[i][:key_size] < key:
+                        heads[i] = next(rows, None)
+                    if heads[i] is not None and heads[i][:key_size] == key:
+                        duplicate = True
+                        break
+                if duplicate:
+                    continue
+                block.append(row)
+                count += 1
+                if len(block) >= BLOCK_SIZE:
+                    self._write(f, block)
+                    block = []
+            if block:
+                self._write(f, block)
+        return path, count
+
+    def trace(self, layers, record):
+        # Recorrido hacia atrás: cada registro guarda la posición de su padre en la capa anterior
+        chain = [record]
+        for path, _ in reversed(layers):
+            chain.append(self.row(path, chain[-1][-2]))
+        chain.reverse()
+
+        arena = NodeArena(self.sokoban_map)
+        node = -1
+        cost = 0
+        for i, row in enumerate(chain):
+            move = self._move_table[row[-1]] if i else None
+            if i:
+                cost += move_cost(move)
+            node = arena.add(self.state(row), node, move, cost)
+        return arena, node
\ No newline at end of file
@@ -0,0 +1,133 @@
+from collections import deque
+
+# Frontera para BFS (cola) y DFS (pila): junto a los ids de nodo guarda un
+# índice de las claves encoladas (ver NodeArena), así preguntar si un estado
+# ya está en la frontera no recorre la cola entera.
+
+class Frontier:
+    __slots__ = ("_nodes", "_keys", "_index", "_lifo", "max_size")
+
+    def __init__(self, lifo=False):
+        # Nodos y claves en dos colas paralelas: sin una tupla por entrada
+        self._nodes = deque()
+        self._keys = deque()
+        self._index = set()
+        self._lifo = lifo
+        self.max_size = 0
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __bool__(self):
+        return bool(self._nodes)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def push(self, node, key):
+        self._nodes.append(node)
+        self._keys.append(key)
+        self._index.add(key)
+        if len(self._nodes) > self.max_size:
+            self.max_size = len(self._nodes)
+
+    def pop(self):
+        if self._lifo:
+            node, key = self._nodes.pop(), self._keys.pop()
+        else:
+            node, key = self._nodes.popleft(), self._keys.popleft()
+        self._index.remove(key)
+        return node, key
+
+    def peek(self):
+        # Nodo que saldría en el próximo pop, sin sacarlo
+        return self._nodes[-1 if self._lifo else 0]
+
+    def nodes(self):
+        # En orden de salida, para guardar la frontera en un checkpoint
+        return list(self._nodes)
+
+# Lista abierta para A*: los costos f son enteros chicos, así que en lugar de
+# un heap se usa un balde por valor de f. Dentro de cada balde el desempate
+# puede ser por g (mayor g primero, que con f fijo es lo mismo que menor h) o
+# por orden de llegada (fifo / lifo).
+
+TIE_BREAKS = ("high_g", "low_h", "fifo", "lifo")
+
+class BucketQueue:
+    __slots__ = ("_buckets", "_by_g", "_lifo", "_min_f", "_size")
+
+    def __init__(self, tie_break="high_g"):
+        if tie_break not in TIE_BREAKS:
+            raise ValueError(f"Desempate desconocido: {tie_break} (opciones: {', '.join(TIE_BREAKS)})")
+        self._buckets = []
+        self._by_g = tie_break in ("high_g", "low_h")
+        self._lifo = tie_break == "lifo"
+        self._min_f = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def push(self, node, f, g):
+        buckets = self._buckets
+        while len(buckets) <= f:
+            buckets.append(None)
+        bucket = buckets[f]
+        if bucket is None:
+            bucket = buckets[f] = [] if self._by_g else deque()
+
+        if self._by_g:
+            while len(bucket) <= g:
+                bucket.append([])
+            bucket[g].append(node)
+        else:
+            bucket.append(node)
+
+        self._size += 1
+        if f < self._min_f:
+            self._min_f = f
+
+    def min_f(self):
+        # Menor f con nodos en la frontera (None si está vacía)
+        if not self._size:
+            return None
+        buckets = self._buckets
+        while not buckets[self._min_f]:
+            self._min_f += 1
+        return self._min_f
+
+    def pop(self):
+        buckets = self._buckets
+        f = self._min_f
+        while not buckets[f]:
+            f += 1
+        self._min_f = f
+        bucket = buckets[f]
+        self._size -= 1
+
+        if self._by_g:
+            # El último sub-balde (g más alto) nunca queda vacío: así un balde
+            # sin nodos es una lista vacía
+            node = bucket[-1].pop()
+            while bucket and not bucket[-1]:
+                bucket.pop()
+            return node
+        return bucket.pop() if self._lifo else bucket.popleft()
+
+    def entries(self):
+        # (nodo, f, g) en un orden que, al volver a insertarlos, reproduce el
+        # mismo orden de salida; g solo importa cuando desempata
+        entries = []
+        for f, bucket in enumerate(self._buckets):
+            if not bucket:
+                continue
+            if self._by_g:
+                for g, nodes in enumerate(bucket):
+                    entries.extend((node, f, g) for node in nodes)
+            else:
+                entries.extend((node, f, 0) for node in bucket)
+        return entries
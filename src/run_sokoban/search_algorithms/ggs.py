@@ -1,37 +1,57 @@
 import time
 import heapq
 import itertools
-from ..sokoban import get_neighbors
-from .utils import get_result
+from collections import Counter
+from ..arena import NodeArena
+from ..sokoban import move_cost
+from .utils import get_result, progress_event, run_steps
+from .budget import over_budget
 
-def ggs(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder):
+def ggs(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, budget=None):
+    return run_steps(ggs_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, budget))
+
+def ggs_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, budget=None, progress=None):
     start_time = time.time()
+    pruned = Counter()
     goals = sokoban_map.goals
+    arena = NodeArena(sokoban_map)
+    keys = arena.keys
+    costs = arena.costs
     frontier = []
     counter = itertools.count()
 
-    heapq.heappush(frontier, (heuristic(initial_state, goals), next(counter), initial_state))
+    heapq.heappush(frontier, (heuristic(initial_state, sokoban_map), next(counter), arena.add(initial_state)))
     explored = set()
     max_frontier = 1
     nodes_expanded = 0
+    best_h = frontier[0][0]
+    next_report = 0
 
     while frontier:
-        _, _, state = heapq.heappop(frontier)
+        h, _, node = heapq.heappop(frontier)
+        key = keys[node]
 
-        if state in explored:
+        if key in explored:
             continue
-        explored.add(state)
+        explored.add(key)
+        state = arena.state(node)
         nodes_expanded += 1
+        best_h = min(best_h, h)
+        if progress and nodes_expanded >= next_report:
+            next_report = nodes_expanded + progress
+            yield progress_event(nodes_expanded, len(frontier), best_h, start_time)
+        stopped = over_budget(budget, nodes_expanded, len(frontier), start_time)
+        if stopped:
+            return get_result(arena, None, nodes_expanded, max_frontier, start_time, success=False, stopped=stopped, pruned=pruned)
 
         if state.is_goal(goals):
-            elapsed = time.time() - start_time
-            return get_result(state, nodes_expanded, max_frontier, start_time, success=True)
+            return get_result(arena, node, nodes_expanded, max_frontier, start_time, success=True, pruned=pruned)
 
-        for neighbor in neighbor_finder(state, sokoban_map, dead_squares):
-            if neighbor not in explored:
-                h = heuristic(neighbor, goals)
-                heapq.heappush(frontier, (h, next(counter), neighbor))
+        for move, neighbor in neighbor_finder(state, sokoban_map, dead_squares, pruned):
+            key = arena.key(neighbor)
+            if key not in explored:
+                h = heuristic(neighbor, sokoban_map)
+                heapq.heappush(frontier, (h, next(counter), arena.add_key(key, node, move, costs[node] + move_cost(move))))
                 max_frontier = max(max_frontier, len(frontier))
 
-    elapsed = time.time() - start_time
-    return get_result(None, nodes_expanded, max_frontier, start_time, success=False)
\ No newline at end of file
+    return get_result(arena, None, nodes_expanded, max_frontier, start_time, success=False, pruned=pruned)
\ No newline at end of file
@@ -1,15 +1,31 @@
 from scipy.optimize import linear_sum_assignment
 import numpy as np
+from ..compiled_level import CompiledLevel
+
+# Todas reciben el mapa de la búsqueda. Las distancias caja-meta salen de las
+# matrices precalculadas del CompiledLevel, que también las comparte con el
+# SokobanMap del motor set; solo un mapa sin compilar las recalcula.
+
+def box_cells(state, sokoban_map):
+    # Números de celda de las cajas, con la numeración de las matrices del nivel
+    if isinstance(sokoban_map, CompiledLevel):
+        return list(sokoban_map.cells(state.box_mask))
+    index = sokoban_map.reachability.index
+    return [index(box) for box in state.boxes]
 
 # Admisibles
-def hungarian_heuristic(state, goals):
-    boxes = [box.pos for box in state.boxes]
-    n = len(boxes)
-    m = len(goals)
-    cost = np.zeros((n, m), dtype=int)
-    for i, b in enumerate(boxes):
-        for j, g in enumerate(goals):
-            cost[i, j] = abs(b[0] - g[0]) + abs(b[1] - g[1])
+def hungarian_heuristic(state, sokoban_map):
+    if sokoban_map.goal_distances is not None:
+        cost = sokoban_map.goal_distances[box_cells(state, sokoban_map)]
+    else:
+        goals = sokoban_map.goals
+        boxes = list(state.boxes)
+        n = len(boxes)
+        m = len(goals)
+        cost = np.zeros((n, m), dtype=int)
+        for i, b in enumerate(boxes):
+            for j, g in enumerate(goals):
+                cost[i, j] = abs(b[0] - g[0]) + abs(b[1] - g[1])
 
     row_ind, col_ind = linear_sum_assignment(cost)
     return int(cost[row_ind, col_ind].sum())
@@ -17,21 +33,40 @@ def hungarian_heuristic(state, goals):
 def manhattan_distance(pos1, pos2):
     return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
 
-def manhattan_heuristic(state, goals):
+def manhattan_heuristic(state, sokoban_map):
+    if sokoban_map.min_goal_distance is not None:
+        min_goal_distance = sokoban_map.min_goal_distance
+        return sum(min_goal_distance[cell] for cell in box_cells(state, sokoban_map))
+
+    goals = sokoban_map.goals
     total = 0
     for box in state.boxes:
-        total += min(manhattan_distance(box.pos, goal) for goal in goals)
+        total += min(manhattan_distance(box, goal) for goal in goals)
     return total
 
-def heuristic_boxes_out(state, goals):
-    return sum(1 for b in state.boxes if b.pos not in goals)
+def heuristic_boxes_out(state, sokoban_map):
+    if isinstance(sokoban_map, CompiledLevel):
+        return (state.box_mask & ~sokoban_map.goal_mask).bit_count()
+
+    goals = sokoban_map.goals
+    return sum(1 for b in state.boxes if b not in goals)
 
 # No Admisibles
 
-def player_boxes(state, goals):
+def player_boxes(state, sokoban_map):
+    if sokoban_map.min_goal_distance is not None:
+        min_goal_distance = sokoban_map.min_goal_distance
+        position = sokoban_map.reachability.position
+        player = state.player
+        total = 0
+        for cell in box_cells(state, sokoban_map):
+            total += min_goal_distance[cell] + manhattan_distance(position(cell), player)
+        return total
+
+    goals = sokoban_map.goals
     total = 0
     for box in state.boxes:
-        dist_to_goal = min(abs(box.pos[0]-g[0]) + abs(box.pos[1]-g[1]) for g in goals)
-        dist_to_player = abs(box.pos[0]-state.player[0]) + abs(box.pos[1]-state.player[1])
+        dist_to_goal = min(abs(box[0]-g[0]) + abs(box[1]-g[1]) for g in goals)
+        dist_to_player = abs(box[0]-state.player[0]) + abs(box[1]-state.player[1])
         total += dist_to_goal + dist_to_player
     return total
\ No newline at end of file
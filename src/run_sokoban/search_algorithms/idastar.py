@@ -0,0 +1,105 @@
+import time
+from collections import Counter
+from ..arena import NodeArena
+from ..sokoban import move_cost
+from .utils import get_result, progress_event, run_steps
+from .budget import over_budget
+
+# Entradas máximas de la tabla de transposición (0 la desactiva). Cada una es la
+# clave int del estado y su g: unos 100 bytes, ~10 MB con la tabla llena
+TABLE_SIZE = 100000
+
+def idastar(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, table_size=TABLE_SIZE, budget=None):
+    return run_steps(idastar_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, table_size, budget))
+
+def idastar_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, table_size=TABLE_SIZE, budget=None,
+                  progress=None):
+    start_time = time.time()
+    pruned = Counter()
+    goals = sokoban_map.goals
+    nodes_expanded = 0
+    max_frontier = 1
+    peak_nodes = 1
+    iterations = 0
+
+    if initial_state.is_goal(goals):
+        return _path_result(sokoban_map, [(initial_state, None, 0)], 0, 1, start_time, 0, 1, pruned)
+
+    # La tabla guarda la clave compacta de cada estado (la de la arena), no el objeto
+    state_key = NodeArena(sokoban_map).key
+    root_key = state_key(initial_state)
+
+    threshold = heuristic(initial_state, sokoban_map)
+    next_report = 0
+    while True:
+        iterations += 1
+        nodes_expanded += 1
+        next_threshold = None
+
+        path = [(initial_state, None, 0)]
+        stack = [iter(neighbor_finder(initial_state, sokoban_map, dead_squares, pruned))]
+        on_path = {initial_state}
+        # Menor g con el que se llegó a cada estado en esta iteración
+        table = {root_key: 0} if table_size else None
+
+        while stack:
+            successor = next(stack[-1], None)
+            if successor is None:
+                stack.pop()
+                on_path.discard(path.pop()[0])
+                continue
+
+            move, neighbor = successor
+            if neighbor in on_path:
+                continue
+
+            g = path[-1][2] + move_cost(move)
+            if table is not None:
+                key = state_key(neighbor)
+                seen = table.get(key)
+                if seen is not None and seen <= g:
+                    continue
+                if seen is not None or len(table) < table_size:
+                    table[key] = g
+
+            f = g + heuristic(neighbor, sokoban_map)
+            if f > threshold:
+                # El próximo umbral es el menor f que quedó afuera
+                next_threshold = f if next_threshold is None else min(next_threshold, f)
+                continue
+
+            path.append((neighbor, move, g))
+            if neighbor.is_goal(goals):
+                stored = len(path) + (len(table) if table is not None else 0)
+                return _path_result(sokoban_map, path, nodes_expanded, max(max_frontier, len(path)),
+                                    start_time, iterations, max(peak_nodes, stored), pruned)
+
+            on_path.add(neighbor)
+            stack.append(iter(neighbor_finder(neighbor, sokoban_map, dead_squares, pruned)))
+            nodes_expanded += 1
+            max_frontier = max(max_frontier, len(path))
+            if progress and nodes_expanded >= next_report:
+                next_report = nodes_expanded + progress
+                yield progress_event(nodes_expanded, len(path), threshold, start_time)
+            stopped = over_budget(budget, nodes_expanded, len(path), start_time)
+            if stopped:
+                stored = len(path) + (len(table) if table is not None else 0)
+                return get_result(NodeArena(sokoban_map), None, nodes_expanded, max_frontier, start_time,
+                                  success=False, stopped=stopped, iterations=iterations, peak_nodes=max(peak_nodes, stored), pruned=pruned)
+
+        if table is not None:
+            peak_nodes = max(peak_nodes, len(table))
+        if next_threshold is None:
+            break
+        threshold = next_threshold
+
+    return get_result(NodeArena(sokoban_map), None, nodes_expanded, max_frontier, start_time, success=False,
+                      iterations=iterations, peak_nodes=peak_nodes, pruned=pruned)
+
+def _path_result(sokoban_map, path, nodes_expanded, max_frontier, start_time, iterations, peak_nodes, pruned):
+    arena = NodeArena(sokoban_map)
+    node = arena.add(path[0][0])
+    for state, move, g in path[1:]:
+        node = arena.add(state, node, move, g)
+    return get_result(arena, node, nodes_expanded, max_frontier, start_time, success=True,
+                      iterations=iterations, peak_nodes=peak_nodes, pruned=pruned)
\ No newline at end of file
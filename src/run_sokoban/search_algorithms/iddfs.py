@@ -1,38 +1,134 @@
 import time
-from ..sokoban import get_neighbors
-from .utils import get_result
+from collections import Counter
+from ..arena import NodeArena
+from ..sokoban import move_cost
+from .utils import get_result, progress_event, run_steps
+from .budget import over_budget
 
-def iddfs(initial_state, sokoban_map, dead_squares, neighbor_finder, max_depth=50):
+# Entradas máximas de la tabla de transposición por iteración. Cada una es la
+# clave int del estado y su profundidad: unos 100 bytes, ~10 MB con la tabla llena
+TABLE_SIZE = 100000
+
+def iddfs(initial_state, sokoban_map, dead_squares, neighbor_finder, max_depth=50, table_size=TABLE_SIZE, budget=None):
+    return run_steps(iddfs_steps(initial_state, sokoban_map, dead_squares, neighbor_finder, max_depth, table_size, budget))
+
+def iddfs_steps(initial_state, sokoban_map, dead_squares, neighbor_finder, max_depth=50, table_size=TABLE_SIZE, budget=None,
+                progress=None):
     start_time = time.time()
+    pruned = Counter()
     goals = sokoban_map.goals
-    nodes_expanded_total = 0
-    max_frontier_total = 0
-
-    for depth_limit in range(1, max_depth + 1):
-        frontier = [(initial_state, 0)]
-        explored = set()
-        max_frontier = 1
-        nodes_expanded = 0
-
-        while frontier:
-            state, depth = frontier.pop()
-            if state in explored:
+    nodes_expanded = 0
+    max_frontier = 1
+    peak_nodes = 1
+    iterations = 0
+
+    if initial_state.is_goal(goals):
+        return _path_result(sokoban_map, [(initial_state, None, 0)], 0, 1, start_time, 0, 1, pruned)
+
+    # La tabla guarda la clave compacta de cada estado (la de la arena), no el objeto
+    state_key = NodeArena(sokoban_map).key
+    root_key = state_key(initial_state)
+
+    depth_limit = 1
+    step = 1
+    previous_expanded = 0
+    next_report = 0
+    # Límite de la última iteración completa sin meta: no hay soluciones de ese costo o menos
+    proven = 0
+    best = None
+    while True:
+        iterations += 1
+        iteration_expanded = 1
+        next_limit = None
+        found = None
+
+        # Solo se guarda el camino actual y, por cada nivel, los sucesores que faltan
+        path = [(initial_state, None, 0)]
+        stack = [iter(neighbor_finder(initial_state, sokoban_map, dead_squares, pruned))]
+        # Profundidad mínima a la que se llegó a cada estado en esta iteración:
+        # se vuelve a explorar un estado solo si ahora se llega más arriba
+        table = {root_key: 0}
+
+        while stack:
+            successor = next(stack[-1], None)
+            if successor is None:
+                stack.pop()
+                path.pop()
                 continue
-            explored.add(state)
-            nodes_expanded += 1
 
-            if state.is_goal(goals):
-                elapsed = time.time() - start_time
-                return get_result(state, nodes_expanded, max_frontier, start_time, success=True)
+            move, neighbor = successor
+            depth = path[-1][2] + move_cost(move)
+            if depth > depth_limit:
+                next_limit = depth if next_limit is None else min(next_limit, depth)
+                continue
+
+            key = state_key(neighbor)
+            seen = table.get(key)
+            if seen is not None and seen <= depth:
+                continue
+            if seen is not None or len(table) < table_size:
+                table[key] = depth
+
+            path.append((neighbor, move, depth))
+            if neighbor.is_goal(goals):
+                found = list(path)
+                max_frontier = max(max_frontier, len(path))
+                peak_nodes = max(peak_nodes, len(table) + len(path))
+                break
 
             if depth < depth_limit:
-                for neighbor in neighbor_finder(state, sokoban_map, dead_squares):
-                    if neighbor not in explored:
-                        frontier.append((neighbor, depth + 1))
-                        max_frontier = max(max_frontier, len(frontier))
+                stack.append(iter(neighbor_finder(neighbor, sokoban_map, dead_squares, pruned)))
+                iteration_expanded += 1
+                max_frontier = max(max_frontier, len(path))
+                if progress and nodes_expanded + iteration_expanded >= next_report:
+                    next_report = nodes_expanded + iteration_expanded + progress
+                    yield progress_event(nodes_expanded + iteration_expanded, len(path), depth_limit, start_time)
+                stopped = over_budget(budget, nodes_expanded + iteration_expanded, len(path), start_time)
+                if stopped:
+                    return get_result(NodeArena(sokoban_map), None, nodes_expanded + iteration_expanded, max_frontier,
+                                      start_time, success=False, stopped=stopped, iterations=iterations,
+                                      peak_nodes=max(peak_nodes, len(table) + len(path)), pruned=pruned)
+            else:
+                # Hoja en el límite: sus hijos quedan para la próxima iteración
+                path.pop()
+                next_limit = depth_limit + 1 if next_limit is None else min(next_limit, depth_limit + 1)
+
+        nodes_expanded += iteration_expanded
+        peak_nodes = max(peak_nodes, len(table))
+
+        if found is not None:
+            # Si el límite saltó varios niveles puede haber una meta más arriba:
+            # se repite con el límite justo debajo hasta que una iteración no la encuentre
+            best = found
+            cost = best[-1][2]
+            if cost - 1 <= proven:
+                return _path_result(sokoban_map, best, nodes_expanded, max_frontier, start_time, iterations, peak_nodes, pruned)
+            depth_limit = cost - 1
+            continue
+        if best is not None:
+            return _path_result(sokoban_map, best, nodes_expanded, max_frontier, start_time, iterations, peak_nodes, pruned)
+        proven = depth_limit
+
+        # Sin cortes por profundidad el espacio alcanzable ya se recorrió entero
+        if next_limit is None or depth_limit >= max_depth:
+            break
+
+        # Si el árbol casi no crece entre iteraciones se saltan más niveles de una vez
+        if iteration_expanded <= 2 * previous_expanded:
+            step *= 2
+        else:
+            step = max(1, step // 2)
+        previous_expanded = iteration_expanded
+        depth_limit = min(max(next_limit, depth_limit + step), max_depth)
 
-        nodes_expanded_total += nodes_expanded
-        max_frontier_total = max(max_frontier_total, max_frontier)
+    return get_result(NodeArena(sokoban_map), None, nodes_expanded, max_frontier, start_time, success=False,
+                      iterations=iterations, peak_nodes=peak_nodes, pruned=pruned)
 
-    elapsed = time.time() - start_time
-    return get_result(None, nodes_expanded, max_frontier, start_time, success=False)
\ No newline at end of file
+def _path_result(sokoban_map, path, nodes_expanded, max_frontier, start_time, iterations, peak_nodes, pruned):
+    # La arena se arma solo con el camino encontrado para reconstruir la solución
+    arena = NodeArena(sokoban_map)
+    node = arena.add(path[0][0])
+    for state, move, depth in path[1:]:
+        node = arena.add(state, node, move, depth)
+    return get_result(arena, node, nodes_expanded, max_frontier, start_time, success=True,
+                      iterations=iterations, peak_nodes=peak_nodes, pruned=pruned)
\ No newline at end of file
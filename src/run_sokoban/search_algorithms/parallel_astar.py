@@ -0,0 +1,255 @@
+import time
+import heapq
+import itertools
+import multiprocessing as mp
+from queue import Empty
+from collections import Counter
+from ..arena import NodeArena
+from ..sokoban import move_cost
+from .utils import get_result, progress_event, run_steps
+from .budget import over_budget
+
+BATCH_SIZE = 256        # Sucesores por mensaje a otro proceso
+CHUNK_SIZE = 64         # Expansiones entre revisiones de la casilla de entrada
+IDLE_WAIT = 0.01        # Espera de un proceso sin nodos por debajo de la cota (s)
+PROBE_INTERVAL = 0.005  # Pausa del coordinador entre rondas de sondeo (s)
+REPORT_WAIT = 1.0       # Espera por un mensaje antes de revisar que los procesos sigan vivos (s)
+
+# A* distribuido por hash: cada estado tiene un dueño (zobrist % workers) que
+# guarda su mejor g y su padre, y es el único que lo expande. Los sucesores
+# ajenos viajan en lotes a la cola del dueño. Un proceso que expande una meta
+# publica su costo como cota; la búsqueda termina cuando ningún proceso tiene
+# nodos con f menor a la cota y no quedan lotes en viaje, así que la solución
+# sigue siendo óptima con una heurística admisible.
+
+def parallel_astar(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, workers=4, budget=None):
+    return run_steps(parallel_astar_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, workers,
+                                          budget))
+
+def parallel_astar_steps(initial_state, sokoban_map, heuristic, dead_squares, neighbor_finder, workers=4, budget=None,
+                         progress=None):
+    start_time = time.time()
+    pruned = Counter()
+
+    inboxes = [mp.Queue() for _ in range(workers)]
+    reports = mp.Queue()
+    root = sokoban_map.pack_state(initial_state)
+    processes = [
+        mp.Process(target=_worker, daemon=True,
+                   args=(rank, inboxes, reports, sokoban_map, heuristic, dead_squares, neighbor_finder, root))
+        for rank in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        # Si quien consume los eventos abandona el generador, el finally igual detiene los procesos
+        goal, statuses, stopped = yield from _coordinate(inboxes, reports, processes, budget, start_time, progress)
+        path = _trace(goal, inboxes, reports, processes) if goal is not None else None
+    finally:
+        for inbox in inboxes:
+            inbox.put(("stop",))
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+    # Cada proceso informa sus contadores en la última ronda de sondeo
+    messages = sum(sent for sent, _, _, _, _ in statuses)
+    nodes_expanded = sum(expanded for _, _, expanded, _, _ in statuses)
+    max_frontier = sum(max_open for _, _, _, max_open, _ in statuses)
+    for _, _, _, _, worker_pruned in statuses:
+        pruned.update(worker_pruned)
+
+    # Si el presupuesto se agotó con una solución ya encontrada se devuelve esa,
+    # aunque todavía no esté demostrado que sea la óptima
+    if path is None:
+        return get_result(NodeArena(sokoban_map), None, nodes_expanded, max_frontier, start_time, success=False,
+                          stopped=stopped, workers=workers, messages=messages, pruned=pruned)
+
+    arena = NodeArena(sokoban_map)
+    node = -1
+    cost = 0
+    for key, move in path:
+        if node >= 0:
+            cost += move_cost(move)
+        node = arena.add(sokoban_map.unpack_state(key), node, move, cost)
+    return get_result(arena, node, nodes_expanded, max_frontier, start_time, success=True,
+                      stopped=stopped, workers=workers, messages=messages, pruned=pruned)
+
+def _coordinate(inboxes, reports, processes, budget, start_time, progress=None):
+    # Detección de terminación con cuatro contadores: dos rondas seguidas con
+    # todos los procesos ociosos, los mismos contadores y tantos lotes
+    # recibidos como enviados garantizan que no queda trabajo en ningún lado
+    workers = len(inboxes)
+    upper = None
+    goal = None
+    previous = None
+    wave = 0
+    next_report = 0
+
+    while True:
+        wave += 1
+        for inbox in inboxes:
+            inbox.put(("probe", wave))
+
+        statuses = [None] * workers
+        pending = workers
+        while pending:
+            message = _receive(reports, processes)
+            if message[0] == "goal":
+                _, key, g = message
+                if upper is None or g < upper:
+                    upper, goal = g, key
+                    for inbox in inboxes:
+                        inbox.put(("bound", g))
+            elif message[0] == "status" and message[1] == wave:
+                statuses[message[2]] = message[3:]
+                pending -= 1
+
+        # Entre rondas el presupuesto y el progreso se miran con los contadores sumados de todos
+        expanded = sum(status[3] for status in statuses)
+        frontier = sum(status[4] for status in statuses)
+        if progress and expanded >= next_report:
+            next_report = expanded + progress
+            yield progress_event(expanded, frontier, upper, start_time, waves=wave)
+        if budget is not None:
+            stopped = over_budget(budget, expanded, frontier, start_time) or budget.poll(start_time)
+            if stopped:
+                return goal, [status[1:] for status in statuses], stopped
+
+        counts = [(status[1], status[2]) for status in statuses]
+        if all(status[0] for status in statuses):
+            if counts == previous and sum(sent for sent, _ in counts) == sum(received for _, received in counts):
+                return goal, [status[1:] for status in statuses], None
+            previous = counts
+        else:
+            previous = None
+        time.sleep(PROBE_INTERVAL)
+
+def _trace(goal, inboxes, reports, processes):
+    # El camino se arma preguntando a cada dueño por el padre de su estado
+    workers = len(inboxes)
+    path = []
+    key = goal
+    while key is not None:
+        inboxes[key[-1] % workers].put(("trace", key))
+        message = _receive(reports, processes)
+        while message[0] != "parent" or message[1] != key:
+            message = _receive(reports, processes)
+        _, _, parent, move = message
+        path.append((key, move))
+        key = parent
+    path.reverse()
+    return path
+
+def _receive(reports, processes):
+    # Un proceso que murió (error, falta de memoria, kill) nunca va a responder:
+    # en lugar de esperar para siempre se revisa cada tanto que sigan vivos
+    while True:
+        try:
+            return reports.get(timeout=REPORT_WAIT)
+        except Empty:
+            for rank, process in enumerate(processes):
+                if not process.is_alive():
+                    raise RuntimeError(f"El proceso {rank} de A* paralelo terminó inesperadamente "
+                                       f"(exitcode={process.exitcode})")
+
+def _worker(rank, inboxes, reports, sokoban_map, heuristic, dead_squares, neighbor_finder, root):
+    # Al recibir "stop" los lotes que nadie va a leer se descartan sin esperar
+    for queue in inboxes + [reports]:
+        queue.cancel_join_thread()
+    pruned = Counter()
+
+    workers = len(inboxes)
+    inbox = inboxes[rank]
+    goals = sokoban_map.goals
+    pack = sokoban_map.pack_state
+    unpack = sokoban_map.unpack_state
+
+    open_list = []
+    counter = itertools.count()
+    best_g = {}
+    parents = {}
+    upper = float("inf")
+    sent = received = expanded = max_open = 0
+    outgoing = [[] for _ in range(workers)]
+
+    def insert(key, g, h, parent, move):
+        nonlocal max_open
+        known = best_g.get(key)
+        if g + h >= upper or (known is not None and known <= g):
+            return
+        best_g[key] = g
+        parents[key] = (parent, move)
+        heapq.heappush(open_list, (g + h, -g, next(counter), key))
+        max_open = max(max_open, len(open_list))
+
+    if root[-1] % workers == rank:
+        insert(root, 0, heuristic(unpack(root), sokoban_map), None, None)
+
+    while True:
+        busy = open_list and open_list[0][0] < upper
+        try:
+            message = inbox.get_nowait() if busy else inbox.get(timeout=IDLE_WAIT)
+        except Empty:
+            message = None
+
+        while message is not None:
+            kind = message[0]
+            if kind == "nodes":
+                received += 1
+                for item in message[1]:
+                    insert(*item)
+            elif kind == "bound":
+                upper = min(upper, message[1])
+            elif kind == "probe":
+                idle = not (open_list and open_list[0][0] < upper)
+                reports.put(("status", message[1], rank, idle, sent, received, expanded, max_open, dict(pruned)))
+            elif kind == "trace":
+                parent, move = parents[message[1]]
+                reports.put(("parent", message[1], parent, move))
+            elif kind == "stop":
+                return
+            try:
+                message = inbox.get_nowait()
+            except Empty:
+                message = None
+
+        for _ in range(CHUNK_SIZE):
+            if not open_list or open_list[0][0] >= upper:
+                break
+            _, neg_g, _, key = heapq.heappop(open_list)
+            g = -neg_g
+            if best_g.get(key) != g:
+                continue
+
+            state = unpack(key)
+            expanded += 1
+            if state.is_goal(goals):
+                upper = g
+                reports.put(("goal", key, g))
+                continue
+
+            for move, neighbor in neighbor_finder(state, sokoban_map, dead_squares, pruned):
+                child_g = g + move_cost(move)
+                h = heuristic(neighbor, sokoban_map)
+                if child_g + h >= upper:
+                    continue
+                item = (pack(neighbor), child_g, h, key, move)
+                owner = neighbor.zobrist % workers
+                if owner == rank:
+                    insert(*item)
+                    continue
+                outgoing[owner].append(item)
+                if len(outgoing[owner]) >= BATCH_SIZE:
+                    inboxes[owner].put(("nodes", outgoing[owner]))
+                    outgoing[owner] = []
+                    sent += 1
+
+        # Los lotes a medio llenar salen antes de volver a mirar la casilla
+        for owner, batch in enumerate(outgoing):
+            if batch:
+                inboxes[owner].put(("nodes", batch))
+                outgoing[owner] = []
+                sent += 1
\ No newline at end of file
@@ -1,23 +1,69 @@
 import time
 from ..sokoban import reconstruct_path
 
-def get_result(state, nodes_expanded, max_frontier, start_time, success=True):
+# La cancelación externa se distingue de los límites de tiempo, nodos o frontera
+STOPPED_STATUS = {"cancel": "Cancelado", "time": "Límite", "nodes": "Límite", "frontier": "Límite"}
+
+PROGRESS_INTERVAL = 1000  # Expansiones entre eventos de progreso, para quien escuche
+
+# Cada búsqueda es un generador <algoritmo>_steps(..., progress=None) que cada
+# progress expansiones hace yield de un evento de progreso y termina con
+# return del resultado. Con progress=None no hace ningún yield, así que la
+# función bloqueante (run_steps) cuesta lo mismo que antes; stream entrega los
+# eventos y, como último elemento, el resultado.
+
+def get_result(arena, node, nodes_expanded, max_frontier, start_time, success=True, stopped=None, pruned=None, **extra):
+    # extra: métricas propias de cada algoritmo (se agregan tal cual al resultado).
+    # stopped: motivo por el que se cortó la búsqueda (ver SearchBudget.check).
+    # pruned: Counter propio de la búsqueda con los sucesores descartados por cada poda
     elapsed = time.time() - start_time
+    pruned = pruned or {}
     if success:
-        return {
+        result = {
             "result": "Éxito",
-            "solution": reconstruct_path(state),
-            "cost": state.cost,
+            "solution": reconstruct_path(arena, node),
+            "cost": arena.costs[node],
             "nodes_expanded": nodes_expanded,
             "max_frontier": max_frontier,
-            "time": elapsed
+            "time": elapsed,
+            "pruned_freeze": pruned.get("freeze", 0),
+            "pruned_pattern": pruned.get("pattern", 0),
+            "stop_reason": stopped
         }
     else:
-        return {
-            "result": "Fracaso",
+        result = {
+            "result": STOPPED_STATUS.get(stopped, "Fracaso"),
             "solution": [],
             "cost": None,
             "nodes_expanded": nodes_expanded,
             "max_frontier": max_frontier,
-            "time": elapsed
-        }
\ No newline at end of file
+            "time": elapsed,
+            "pruned_freeze": pruned.get("freeze", 0),
+            "pruned_pattern": pruned.get("pattern", 0),
+            "stop_reason": stopped
+        }
+    result.update(extra)
+    return result
+
+def progress_event(nodes_expanded, frontier_size, best, start_time, **extra):
+    # best: menor f de la frontera en A* y beam, umbral en IDA*, cota (costo de
+    # la mejor solución) en PA* y ARA*, menor h en GGS, profundidad en las no informadas
+    return {
+        "event": "progress",
+        "nodes_expanded": nodes_expanded,
+        "frontier": frontier_size,
+        "best": best,
+        "time": time.time() - start_time,
+        **extra
+    }
+
+def run_steps(steps):
+    try:
+        while True:
+            next(steps)
+    except StopIteration as stop:
+        return stop.value
+
+def stream(steps):
+    result = yield from steps
+    yield result
\ No newline at end of file
@@ -1,6 +1,22 @@
+import random
 from collections import deque
 
+from .reachability import Reachability, lowest_cell
+
+ZOBRIST_SEED = 2024
+
+DELTAS = {
+    "Up": (-1, 0),
+    "Down": (1, 0),
+    "Left": (0, -1),
+    "Right": (0, 1)
+}
+
+OPPOSITE = {"Up": "Down", "Down": "Up", "Left": "Right", "Right": "Left"}
+
 class Box:
+    __slots__ = ("id", "pos")
+
     def __init__(self, box_id, pos):
         self.id = box_id
         self.pos = pos
@@ -22,25 +38,151 @@ class SokobanMap:
         self.player = player
         self.floors = floors
 
+        # Claves Zobrist: una por (celda, caja) y otra por (celda, jugador)
+        rng = random.Random(ZOBRIST_SEED)
+        self.zobrist_boxes = {}
+        self.zobrist_player = {}
+        for pos in sorted(floors):
+            self.zobrist_boxes[pos] = rng.getrandbits(64)
+            self.zobrist_player[pos] = rng.getrandbits(64)
+
+        # Base de patrones de deadlock (la asigna compile_level)
+        self.deadlock_patterns = None
+
+        # Celdas de túnel por dirección de empuje: pared a ambos lados del eje
+        self.tunnels = find_tunnels(walls, floors)
+
+        # Cuarto de metas con su orden de llenado (lo asigna CompiledLevel)
+        self.goal_room = None
+
+        # Distancias caja-meta precalculadas por número de celda (las asigna CompiledLevel)
+        self.goal_distances = None
+        self.min_goal_distance = None
+
+        # Alcanzabilidad del jugador con máscaras de bits y caché por configuración de cajas
+        self.reachability = Reachability(walls, floors, player)
+
+        # Bit y posición de cada celda de piso: pasar un estado a su clave en la
+        # arena y de vuelta pasa en cada nodo, sin recalcular índices
+        index = self.reachability.index
+        self.cell_bits = {pos: 1 << index(pos) for pos in floors}
+        self.cell_positions = {index(pos): pos for pos in floors}
+
     def __repr__(self):
         return f"<SokobanMap player={self.player} boxes={len(self.boxes)} goals={len(self.goals)}>"
 
+    def zobrist(self, player, boxes):
+        value = self.zobrist_player[player]
+        for pos in boxes:
+            value ^= self.zobrist_boxes[pos]
+        return value
+
+    def initial_state(self, mode="player"):
+        boxes = frozenset(box.pos for box in self.boxes)
+        player = self.player
+        if mode == "push":
+            # Con empujes la raíz usa el mismo representante de región que get_push_neighbors
+            reach = self.reachability
+            player = reach.position(lowest_cell(reach.region(reach.index(player), reach.mask_of(boxes))))
+        return SokobanState(player, boxes, zobrist=self.zobrist(player, boxes))
+
+    def pack_state(self, state):
+        # Forma compacta de un estado para mandarlo a otro proceso
+        return (state.player, state.boxes, state.zobrist)
+
+    def unpack_state(self, packed):
+        player, boxes, zobrist = packed
+        return SokobanState(player, boxes, zobrist=zobrist)
+
+    def encode_state(self, state):
+        # Registro de ancho fijo: celda del jugador y máscara de cajas con la numeración de reachability
+        bits = self.cell_bits
+        box_mask = 0
+        for pos in state.boxes:
+            box_mask |= bits[pos]
+        return self.reachability.index(state.player), box_mask
+
+    def decode_state(self, player_index, box_mask):
+        # El hash Zobrist se arma en la misma pasada que las cajas
+        positions = self.cell_positions
+        zobrist_boxes = self.zobrist_boxes
+        player = positions[player_index]
+        zobrist = self.zobrist_player[player]
+        boxes = []
+        while box_mask:
+            low = box_mask & -box_mask
+            pos = positions[low.bit_length() - 1]
+            boxes.append(pos)
+            zobrist ^= zobrist_boxes[pos]
+            box_mask ^= low
+        return SokobanState(player, boxes, zobrist=zobrist)
+
+    def goal_states(self):
+        # Estados resueltos: todas las cajas en las metas y el jugador en
+        # cualquiera de las regiones que quedan libres alrededor de ellas
+        reach = self.reachability
+        boxes = frozenset(self.goals)
+        box_mask = reach.mask_of(boxes)
+        free = reach.floor_mask & ~box_mask
+        states = []
+        while free:
+            region = reach.region(lowest_cell(free), box_mask)
+            player = reach.position(lowest_cell(region))
+            states.append(SokobanState(player, boxes, zobrist=self.zobrist(player, boxes)))
+            free &= ~region
+        return states
+
+    def label_moves(self, moves):
+        # Los ids de las cajas solo viven aquí: se reproducen los movimientos
+        # (acción, celda de la caja) desde la posición inicial del mapa
+        ids = {box.pos: box.id for box in self.boxes}
+        labeled = []
+        for move in moves:
+            action, pos = move[0], move[1]
+            if pos is None:
+                labeled.append((action, None))
+                continue
+            # Un macro-movimiento de túnel se expande en sus empujes individuales
+            pushes = move_cost(move)
+            dr, dc = DELTAS[action]
+            box_id = ids.pop(pos)
+            ids[(pos[0]+pushes*dr, pos[1]+pushes*dc)] = box_id
+            labeled.extend([(action, box_id)] * pushes)
+        return labeled
+
+def find_tunnels(walls, floors):
+    tunnels = {}
+    for action, (dr, dc) in DELTAS.items():
+        tunnels[action] = frozenset(
+            (r, c) for r, c in floors
+            if (r+dc, c+dr) in walls and (r-dc, c-dr) in walls
+        )
+    return tunnels
+
+def move_cost(move):
+    # Los macro-movimientos de túnel llevan la cantidad de empujes como tercer campo
+    return move[2] if len(move) > 2 else 1
+
 class SokobanState:
-    def __init__(self, player, boxes, parent=None, move=None, cost=0):
+    # Las cajas son solo posiciones: dos estados con las mismas celdas ocupadas
+    # son el mismo estado sin importar qué caja está en cada una.
+    # Padre, movimiento y costo viven en el NodeArena de la búsqueda
+    __slots__ = ("player", "boxes", "zobrist")
+
+    def __init__(self, player, boxes, zobrist=None):
         self.player = player
         self.boxes = frozenset(boxes)
-        self.parent = parent
-        self.move = move
-        self.cost = cost
+        # Los sucesores reciben el hash derivado del padre; sin mapa se usa el hash de la tupla
+        self.zobrist = hash((self.player, self.boxes)) if zobrist is None else zobrist
 
     def is_goal(self, goals):
-        return {b.pos for b in self.boxes} == goals
+        return self.boxes == goals
 
     def __hash__(self):
-        return hash((self.player, self.boxes))
+        return self.zobrist
 
     def __eq__(self, other):
-        return (self.player, self.boxes) == (other.player, other.boxes)
+        return self.zobrist == other.zobrist and self.player == other.player and self.boxes == other.boxes
 
 def parse_map(filepath):
     walls = set()
@@ -81,42 +223,59 @@ def parse_map(filepath):
 
     return SokobanMap(walls, goals, boxes, player, floors)
 
-def get_neighbors(state, sokoban_map, dead_squares):
+def get_neighbors(state, sokoban_map, dead_squares, pruned=None):
     moves = [(-1,0,'Up'), (1,0,'Down'), (0,-1,'Left'), (0,1,'Right')]
     neighbors = []
 
     walls = sokoban_map.walls
+    floors = sokoban_map.floors
     goals = sokoban_map.goals
     boxes = state.boxes
+    zobrist_boxes = sokoban_map.zobrist_boxes
+    zobrist_player = sokoban_map.zobrist_player
+    patterns = sokoban_map.deadlock_patterns
 
     for dr, dc, action in moves:
         new_r = state.player[0] + dr
         new_c = state.player[1] + dc
         new_pos = (new_r, new_c)
 
-        if new_pos in walls:
+        # En mapas sin borde completo el jugador no sale del piso (las claves
+        # Zobrist y la numeración de celdas solo cubren las celdas de piso)
+        if new_pos not in floors:
             continue
 
-        new_boxes = set(boxes)
+        new_boxes = boxes
+        new_hash = state.zobrist ^ zobrist_player[state.player] ^ zobrist_player[new_pos]
+        box_cell = None
 
-        box_to_move = next((b for b in boxes if b.pos == new_pos), None)
-        if box_to_move:
-            new_box_pos = (box_to_move.pos[0]+dr, box_to_move.pos[1]+dc)
+        if new_pos in boxes:
+            new_box_pos = (new_r+dr, new_c+dc)
 
-            if new_box_pos in walls or any(b.pos == new_box_pos for b in boxes):
+            if new_box_pos not in floors or new_box_pos in boxes:
                 continue
 
             if new_box_pos in dead_squares and new_box_pos not in goals:
                 continue
 
-            if is_box_stuck(new_box_pos, {b.pos for b in new_boxes - {box_to_move}} | {new_box_pos}, walls, goals):
+            new_boxes = boxes - {new_pos} | {new_box_pos}
+            if is_box_stuck(new_box_pos, new_boxes, walls, goals):
+                continue
+
+            if is_freeze_deadlock(new_box_pos, new_boxes, walls, goals, dead_squares):
+                if pruned is not None:
+                    pruned["freeze"] += 1
                 continue
 
-            new_boxes.remove(box_to_move)
-            new_boxes.add(Box(box_to_move.id, new_box_pos))
+            if patterns is not None and patterns.is_deadlock_at(new_box_pos, new_boxes, dead_squares):
+                if pruned is not None:
+                    pruned["pattern"] += 1
+                continue
+
+            box_cell = new_pos
+            new_hash ^= zobrist_boxes[new_pos] ^ zobrist_boxes[new_box_pos]
 
-        move_record = (action, box_to_move.id if box_to_move else None)
-        neighbors.append(SokobanState(new_pos, new_boxes, parent=state, move=move_record, cost=state.cost+1))
+        neighbors.append(((action, box_cell), SokobanState(new_pos, new_boxes, zobrist=new_hash)))
 
     return neighbors
 
@@ -133,90 +292,179 @@ def is_box_stuck(box_pos, boxes, walls, goals):
             return False
     return True
 
-def reconstruct_path(state):
+def is_freeze_deadlock(box_pos, boxes, walls, goals, dead_squares):
+    # La caja recién empujada y las que la bloquean quedan congeladas si no
+    # pueden moverse en ningún eje; es deadlock si alguna no está en una meta
+    frozen = []
+    if _is_frozen(box_pos, boxes, walls, dead_squares, frozenset(), frozen):
+        return any(pos not in goals for pos in frozen)
+    return False
+
+def _is_frozen(box_pos, boxes, walls, dead_squares, checked, frozen):
+    # Las cajas ya revisadas cuentan como pared para no entrar en ciclos.
+    # Solo se agregan a frozen las cajas de una cadena que terminó congelada.
+    checked = checked | {box_pos}
+    chain = [box_pos]
+    r, c = box_pos
+    for dr, dc in [(0,1), (1,0)]:
+        before = (r-dr, c-dc)
+        after = (r+dr, c+dc)
+
+        if before in walls or after in walls or before in checked or after in checked:
+            continue
+        if before in dead_squares and after in dead_squares:
+            continue
+        if any(n in boxes and _is_frozen(n, boxes, walls, dead_squares, checked, chain) for n in (before, after)):
+            continue
+        return False
+
+    frozen.extend(chain)
+    return True
+
+def reconstruct_path(arena, node):
     path = []
-    while state.parent is not None:
-        path.append(state.move)
-        state = state.parent
-    return list(reversed(path))
+    parents = arena.parents
+    while parents[node] >= 0:
+        path.append(arena.move(node))
+        node = parents[node]
+    path.reverse()
+
+    # Los movimientos registran la celda de la caja; se traducen a su id
+    return arena.sokoban_map.label_moves(path)
 
 def precompute_dead_squares(sokoban_map):
-    walls = sokoban_map.walls
+    # Búsqueda inversa: desde cada meta se "tira" de una caja sola por el mapa.
+    # Una caja en la celda b puede tirarse hacia b+d si el jugador cabe en b+d
+    # y puede retroceder a b+2d. Toda celda de piso a la que no se llega así
+    # es una casilla muerta: desde ella ninguna caja puede empujarse a una meta.
     floors = sokoban_map.floors
     goals = sokoban_map.goals
-    
-    dead_squares = set()
-    
-    for r, c in floors:
-        if (r, c) in goals:
-            continue
 
-        exits = sum((r+dr, c+dc) not in walls for dr, dc in [(1,0), (-1,0), (0,1), (0,-1)])
-        if exits == 1:
-            dead_squares.add((r, c))
-            continue
+    live_squares = set(goals)
+    queue = deque(goals)
+    while queue:
+        r, c = queue.popleft()
+        for dr, dc in [(1,0), (-1,0), (0,1), (0,-1)]:
+            box_pos = (r+dr, c+dc)
+            player_pos = (r+2*dr, c+2*dc)
+            if box_pos in live_squares:
+                continue
+            if box_pos in floors and player_pos in floors:
+                live_squares.add(box_pos)
+                queue.append(box_pos)
 
-        is_corner = (
-            ((r-1, c) in walls and (r, c-1) in walls) or
-            ((r-1, c) in walls and (r, c+1) in walls) or
-            ((r+1, c) in walls and (r, c-1) in walls) or
-            ((r+1, c) in walls and (r, c+1) in walls)
-        )
-        if is_corner:
-            near_goal = any((r+dr, c+dc) in goals for dr, dc in [(1,0), (-1,0), (0,1), (0,-1)])
-            if not near_goal:
-                dead_squares.add((r, c))
-    
-    return dead_squares
+    return floors - live_squares
 
-def compute_reachable(player, boxes, walls):
-    box_positions = {box.pos for box in boxes}
-    reachable = set()
-    queue = deque([player])
-    while queue:
-        pos = queue.popleft()
-        if pos in reachable:
-            continue
-        reachable.add(pos)
-        r, c = pos
-        for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-            new_pos = (r+dr, c+dc)
-            if new_pos not in walls and new_pos not in box_positions and new_pos not in reachable:
-                queue.append(new_pos)
-    return reachable
-
-def get_push_neighbors(state, sokoban_map, dead_squares):
+def get_push_neighbors(state, sokoban_map, dead_squares, pruned=None):
     directions = [(-1,0,'Up'), (1,0,'Down'), (0,-1,'Left'), (0,1,'Right')]
     neighbors = []
 
     walls = sokoban_map.walls
+    floors = sokoban_map.floors
     goals = sokoban_map.goals
     boxes = state.boxes
 
-    box_positions = {b.pos for b in boxes}
-    reachable = compute_reachable(state.player, boxes, walls)
-
-    for box in boxes:
+    zobrist_boxes = sokoban_map.zobrist_boxes
+    zobrist_player = sokoban_map.zobrist_player
+    patterns = sokoban_map.deadlock_patterns
+    tunnels = sokoban_map.tunnels
+    goal_room = sokoban_map.goal_room
+    reach = sokoban_map.reachability
+    index = reach.index
+
+    box_mask = reach.mask_of(boxes)
+    reachable = reach.region(index(state.player), box_mask)
+    base_hash = state.zobrist ^ zobrist_player[state.player]
+
+    # Las cajas en orden de celda, como el motor bitboard: el orden de los
+    # sucesores no depende de cómo se armó el frozenset (un estado reanudado
+    # desde un checkpoint expande igual que en la corrida original)
+    for box in sorted(boxes):
         for dr, dc, move in directions:
-            push_from = (box.pos[0]-dr, box.pos[1]-dc)
-            new_box_pos = (box.pos[0]+dr, box.pos[1]+dc)
+            push_from = (box[0]-dr, box[1]-dc)
+            new_box_pos = (box[0]+dr, box[1]+dc)
 
-            if push_from not in reachable:
+            if not reachable >> index(push_from) & 1:
                 continue
 
-            if new_box_pos in walls or new_box_pos in box_positions:
+            # Como el motor bitboard con floor_mask: en mapas sin borde completo
+            # la caja no sale del piso
+            if new_box_pos not in floors or new_box_pos in boxes:
                 continue
 
             if new_box_pos in dead_squares and new_box_pos not in goals:
                 continue
 
-            updated_boxes = {b if b.id != box.id else Box(b.id, new_box_pos) for b in boxes}
+            # Macro-movimiento: dentro de un túnel el jugador solo puede seguir
+            # empujando, así que la caja avanza hasta salir o llegar a una meta
+            pushes = 1
+            player_pos = box
+            tunnel = tunnels[move]
+            while player_pos in tunnel and new_box_pos in tunnel and new_box_pos not in goals:
+                next_pos = (new_box_pos[0]+dr, new_box_pos[1]+dc)
+                if next_pos not in floors or next_pos in boxes or (next_pos in dead_squares and next_pos not in goals):
+                    break
+                player_pos, new_box_pos = new_box_pos, next_pos
+                pushes += 1
+
+            if goal_room is not None and not goal_room.allows_push(box, new_box_pos, boxes):
+                continue
+
+            updated_boxes = boxes - {box} | {new_box_pos}
+
+            if is_box_stuck(new_box_pos, updated_boxes, walls, goals):
+                continue
+
+            if is_freeze_deadlock(new_box_pos, updated_boxes, walls, goals, dead_squares):
+                if pruned is not None:
+                    pruned["freeze"] += 1
+                continue
+
+            if patterns is not None and patterns.is_deadlock_at(new_box_pos, updated_boxes, dead_squares):
+                if pruned is not None:
+                    pruned["pattern"] += 1
+                continue
+
+            # El jugador queda en la celda que ocupaba la caja (el movimiento lo
+            # registra), pero el estado guarda el representante de su región
+            region = reach.region(index(box), box_mask ^ (1 << index(box)) | (1 << index(new_box_pos)))
+            new_player_pos = reach.position(lowest_cell(region))
+            new_hash = base_hash ^ zobrist_player[new_player_pos] ^ zobrist_boxes[box] ^ zobrist_boxes[new_box_pos]
+            push = (move, box) if pushes == 1 else (move, box, pushes)
+            neighbors.append((push, SokobanState(new_player_pos, updated_boxes, zobrist=new_hash)))
+
+    return neighbors
+
+def get_pull_neighbors(state, sokoban_map, dead_squares, pruned=None):
+    # Sucesores hacia atrás para la búsqueda bidireccional: el jugador, pegado
+    # a una caja, retrocede un paso y la arrastra. Cada tirón se registra como
+    # el empuje que lo deshace, así el camino hacia atrás se lee al revés como
+    # una solución. Las casillas muertas no aplican: desde una caja tirada
+    # siempre se puede volver a empujar hasta las metas.
+    neighbors = []
+
+    boxes = state.boxes
+    zobrist_boxes = sokoban_map.zobrist_boxes
+    zobrist_player = sokoban_map.zobrist_player
+    reach = sokoban_map.reachability
+    index = reach.index
+
+    box_mask = reach.mask_of(boxes)
+    reachable = reach.region(index(state.player), box_mask)
+    base_hash = state.zobrist ^ zobrist_player[state.player]
+
+    for box in sorted(boxes):
+        for move, (dr, dc) in DELTAS.items():
+            pull_from = (box[0]+dr, box[1]+dc)
+            step_to = (box[0]+2*dr, box[1]+2*dc)
 
-            if is_box_stuck(new_box_pos, {b.pos for b in updated_boxes}, walls, goals):
+            if not reachable >> index(pull_from) & 1 or not reachable >> index(step_to) & 1:
                 continue
 
-            new_player_pos = box.pos
-            move_record = (move, box.id)
-            neighbors.append(SokobanState(new_player_pos, updated_boxes, parent=state, move=move_record, cost=state.cost+1))
+            updated_boxes = boxes - {box} | {pull_from}
+            region = reach.region(index(step_to), box_mask ^ (1 << index(box)) | (1 << index(pull_from)))
+            new_player_pos = reach.position(lowest_cell(region))
+            new_hash = base_hash ^ zobrist_player[new_player_pos] ^ zobrist_boxes[box] ^ zobrist_boxes[pull_from]
+            neighbors.append(((OPPOSITE[move], pull_from), SokobanState(new_player_pos, updated_boxes, zobrist=new_hash)))
 
     return neighbors
\ No newline at end of file
@@ -1,28 +1,51 @@
 import os
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from src.run_sokoban.sokoban import parse_map, SokobanState, precompute_dead_squares, get_push_neighbors, get_neighbors
-from src.run_sokoban.search_algorithms.bfs import bfs
-from src.run_sokoban.search_algorithms.dfs import dfs
-from src.run_sokoban.search_algorithms.iddfs import iddfs
-from src.run_sokoban.search_algorithms.astar import astar
-from src.run_sokoban.search_algorithms.ggs import ggs
+from src.run_sokoban.sokoban import get_push_neighbors, get_neighbors
+from src.run_sokoban.bitboard import get_bitboard_neighbors, get_bitboard_push_neighbors
+from src.run_sokoban.compiled_level import compile_level, search_map
+from src.run_sokoban.search_algorithms.bfs import bfs_steps
+from src.run_sokoban.search_algorithms.dfs import dfs_steps
+from src.run_sokoban.search_algorithms.iddfs import iddfs_steps
+from src.run_sokoban.search_algorithms.idastar import idastar_steps
+from src.run_sokoban.search_algorithms.astar import astar_steps
+from src.run_sokoban.search_algorithms.ggs import ggs_steps
+from src.run_sokoban.search_algorithms.utils import stream
 from src.run_sokoban.search_algorithms.heuristics import manhattan_heuristic, heuristic_boxes_out, player_boxes, hungarian_heuristic
+from src.level_results import solve_portfolio
 from src.animation_window import AnimationWindow
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Las búsquedas corren dentro del loop de Tk: cada turno avanza el generador
+# hasta TIME_SLICE segundos y devuelve el control para que la ventana responda
+PROGRESS_INTERVAL = 2000  # Expansiones entre actualizaciones del estado
+TIME_SLICE = 0.05
+
+# Nombres de level_results para correr los algoritmos y heurísticas de la interfaz en el portafolio
+PORTFOLIO_ALGORITHMS = {"BFS": "bfs", "DFS": "dfs", "IDDFS": "iddfs", "A*": "astar", "GGS": "ggs", "IDA*": "idastar"}
+PORTFOLIO_HEURISTICS = {
+    "manhattan_heuristic": "manhattan",
+    "heuristic_boxes_out": "boxes_out",
+    "player_boxes": "player_boxes",
+    "hungarian_heuristic": "hungarian"
+}
+
 class SokobanGUI:
     def __init__(self, master):
         self.master = master
         master.title("Sokoban Solver")
 
+        # Cada algoritmo recibe el estado inicial, el mapa y los ajustes con los que se encoló (ver current_settings)
+        p = PROGRESS_INTERVAL
         self.algo_map = {
-            "BFS": lambda s: bfs(s, self.sokoban_map.goals, self.sokoban_map, self.dead_squares, self.get_neighbor_method()),
-            "DFS": lambda s: dfs(s, self.sokoban_map.goals, self.sokoban_map, self.dead_squares, self.get_neighbor_method()),
-            "IDDFS": lambda s: iddfs(s, self.sokoban_map, self.dead_squares, self.get_neighbor_method(), 1000),
-            "A*": lambda s: astar(s, self.sokoban_map, self.get_heuristic(), self.dead_squares, self.get_neighbor_method()),
-            "GGS": lambda s: ggs(s, self.sokoban_map, self.get_heuristic(), self.dead_squares, self.get_neighbor_method())
+            "BFS": lambda s, m, c: bfs_steps(s, m.goals, m, self.dead_squares, c["neighbors"], progress=p),
+            "DFS": lambda s, m, c: dfs_steps(s, m.goals, m, self.dead_squares, c["neighbors"], progress=p),
+            "IDDFS": lambda s, m, c: iddfs_steps(s, m, self.dead_squares, c["neighbors"], 1000, progress=p),
+            "A*": lambda s, m, c: astar_steps(s, m, c["heuristic"], self.dead_squares, c["neighbors"], progress=p),
+            "GGS": lambda s, m, c: ggs_steps(s, m, c["heuristic"], self.dead_squares, c["neighbors"], progress=p),
+            "IDA*": lambda s, m, c: idastar_steps(s, m, c["heuristic"], self.dead_squares, c["neighbors"], progress=p)
         }
 
         self.map_text = tk.Text(master, width=40, height=20, font=("Courier", 14))
@@ -42,8 +65,13 @@ class SokobanGUI:
                                            values=["player_mode", "push_mode"])
         self.run_mode_menu.grid(row=2, column=2)
 
+        self.engine = tk.StringVar(value="set_engine")
+        self.engine_menu = ttk.Combobox(master, textvariable=self.engine,
+                                        values=["set_engine", "bitboard_engine"])
+        self.engine_menu.grid(row=2, column=1)
+
         self.algo_var = tk.StringVar(value="A*")
-        self.algo_menu = ttk.Combobox(master, textvariable=self.algo_var, values=["BFS", "DFS", "IDDFS", "A*", "GGS"])
+        self.algo_menu = ttk.Combobox(master, textvariable=self.algo_var, values=list(self.algo_map))
         self.algo_menu.grid(row=1, column=3)
 
         self.heuristic_var = tk.StringVar(value="manhattan_heuristic")
@@ -57,7 +85,22 @@ class SokobanGUI:
         self.animate_button = tk.Button(master, text="Animate Solution", command=self.animate_solution, state=tk.DISABLED)
         self.animate_button.grid(row=2, column=0)
 
+        # Run All en paralelo: se queda con el primer algoritmo que resuelve el nivel
+        self.portfolio = tk.BooleanVar(value=False)
+        self.portfolio_check = tk.Checkbutton(master, text="Portfolio", variable=self.portfolio)
+        self.portfolio_check.grid(row=4, column=0)
+
+        # Progreso de la búsqueda en curso
+        self.status = tk.Label(master, text="", anchor="w")
+        self.status.grid(row=4, column=1, columnspan=3, sticky="we")
+
+        # Búsquedas pendientes (nombre, algoritmo, ajustes) y la que está corriendo (nombre, eventos, ajustes)
+        self.pending = []
+        self.running = None
+
         self.sokoban_map = None
+        self.level = None
+        self.map_path = None
         self.dead_squares = None
         self.initial_state = None
         self.last_solution = None
@@ -108,9 +151,12 @@ class SokobanGUI:
                                               filetypes=[("Text files", "*.txt")])
         if not filepath:
             return
-        self.sokoban_map = parse_map(filepath)
-        self.dead_squares = precompute_dead_squares(self.sokoban_map)
-        self.initial_state = SokobanState(self.sokoban_map.player, self.sokoban_map.boxes)
+        self.stop_searches()
+        self.map_path = filepath
+        self.level = compile_level(filepath)
+        self.sokoban_map = self.level.source
+        self.dead_squares = self.level.dead_squares
+        self.initial_state = self.sokoban_map.initial_state()
         self.display_map()
         self.animate_button.config(state=tk.DISABLED)
         self.last_solution = None
@@ -128,6 +174,8 @@ class SokobanGUI:
             return manhattan_heuristic
 
     def get_neighbor_method(self):
+        if self.engine.get() == "bitboard_engine":
+            return get_bitboard_push_neighbors if self.run_mode.get() == "push_mode" else get_bitboard_neighbors
         if self.run_mode.get() == "player_mode":
             return get_neighbors
         elif self.run_mode.get() == "push_mode":
@@ -135,10 +183,77 @@ class SokobanGUI:
         else:
             return get_neighbors
 
+    def current_settings(self):
+        # Los combobox se pueden cambiar mientras corre una búsqueda: cada una
+        # se queda con los valores del momento en que se encoló
+        return {
+            "mode": self.run_mode.get(),
+            "engine": self.engine.get(),
+            "heuristic": self.get_heuristic(),
+            "neighbors": self.get_neighbor_method()
+        }
+
+    def get_search_level(self, settings):
+        engine = "bitboard" if settings["engine"] == "bitboard_engine" else "set"
+        mode = "push" if settings["mode"] == "push_mode" else "player"
+        sokoban_map, initial_state = search_map(self.level, engine, mode)
+        return initial_state, sokoban_map
+
     def run_algorithm(self, name, algo):
-        result = algo(self.initial_state)
+        self.pending.append((name, algo, self.current_settings()))
+        if self.running is None:
+            self.next_search()
+
+    def next_search(self):
+        if not self.pending:
+            self.running = None
+            self.status.config(text="")
+            return
+        name, algo, settings = self.pending.pop(0)
+        self.running = (name, stream(algo(*self.get_search_level(settings), settings)), settings)
+        self.status.config(text=f"{name}...")
+        self.master.after(1, self.step_search)
+
+    def step_search(self):
+        if self.running is None:
+            return
+        name, events, settings = self.running
+        deadline = time.time() + TIME_SLICE
+        try:
+            for event in events:
+                if event.get("event") != "progress":
+                    # El último evento es el resultado
+                    self.level.deadlock_patterns.save()
+                    self.show_result(name, event, settings["mode"])
+                    self.next_search()
+                    return
+                self.status.config(text=f"{name}: {event['nodes_expanded']} nodes, frontier {event['frontier']}, "
+                                        f"best {event['best']}, {event['time']:.1f} s")
+                if time.time() >= deadline:
+                    break
+        except Exception as e:
+            # Un error corta la tanda: se liberan la búsqueda y la cola y el error queda a la vista
+            self.stop_searches()
+            self.results_text.insert(tk.END, f"=== {name} ===\nError: {e}\n\n")
+            self.status.config(text=f"{name}: error: {e}")
+            return
+        self.master.after(1, self.step_search)
+
+    def stop_searches(self):
+        # Un nuevo pedido reemplaza a las búsquedas que seguían en curso
+        self.pending = []
+        if self.running is not None:
+            self.running[1].close()
+            self.running = None
+        self.status.config(text="")
+
+    def show_result(self, name, result, mode):
         self.results_text.insert(tk.END, f"=== {name} ===\n")
         self.results_text.insert(tk.END, f"Result: {result['result']}\n")
+        if 'time' not in result:
+            # Combinación del portafolio cancelada antes de empezar
+            self.results_text.insert(tk.END, "\n")
+            return
         self.results_text.insert(tk.END, f"Solution cost: {result['cost']}\n")
         self.results_text.insert(tk.END, f"Nodes expanded: {result['nodes_expanded']}\n")
         self.results_text.insert(tk.END, f"Max frontier size: {result['max_frontier']}\n")
@@ -147,7 +262,7 @@ class SokobanGUI:
             moves_text = ' '.join(f"{move[0]}({move[1]})" if move[1] is not None else move[0] for move in result['solution'])
             self.results_text.insert(tk.END, f"Moves: {moves_text}\n\n")
             self.last_solution = result['solution']
-            self.last_mode = self.run_mode.get()
+            self.last_mode = mode
             self.animate_button.config(state=tk.NORMAL)
         else:
             self.results_text.insert(tk.END, "No solution found\n\n")
@@ -160,15 +275,39 @@ class SokobanGUI:
             messagebox.showwarning("No map selected", "Please select a map first.")
             return
         
+        self.stop_searches()
         self.results_text.delete("1.0", tk.END)
+        if self.portfolio.get():
+            self.run_portfolio()
+            return
         for name, algo in self.algo_map.items():
             self.run_algorithm(name, algo)
 
+    def run_portfolio(self):
+        heuristic = PORTFOLIO_HEURISTICS.get(self.heuristic_var.get(), "manhattan")
+        combos = [(key, heuristic if key in ("astar", "ggs", "idastar") else "N/A") for key in PORTFOLIO_ALGORITHMS.values()]
+        run_mode = self.run_mode.get()
+        mode = "push" if run_mode == "push_mode" else "player"
+        engine = "bitboard" if self.engine.get() == "bitboard_engine" else "set"
+        winner, results = solve_portfolio(self.map_path, mode, combos, engine)
+
+        # La ganadora se muestra al final para que su solución quede lista para animar
+        names = {key: name for name, key in PORTFOLIO_ALGORITHMS.items()}
+        ordered = [combo for combo in combos if combo != winner] + ([winner] if winner else [])
+        for combo in ordered:
+            result = results[combo]
+            name = names[combo[0]] + (" (winner)" if combo == winner else "")
+            if result is None:
+                self.results_text.insert(tk.END, f"=== {name} ===\nError\n\n")
+            else:
+                self.show_result(name, result, run_mode)
+
     def run_selected_algorithm(self):
         if not self.initial_state:
             messagebox.showwarning("No map selected", "Please select a map first.")
             return
         
+        self.stop_searches()
         self.results_text.delete("1.0", tk.END)
         name = self.algo_var.get()
         self.run_algorithm(name, self.algo_map[name])
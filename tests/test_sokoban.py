@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+from src.level_results import run_algorithm
+from src.run_sokoban.compiled_level import compile_level
+from src.run_sokoban.sokoban import SokobanState, get_push_neighbors, parse_map
+from src.run_sokoban.bitboard import BitboardState, get_bitboard_push_neighbors
+
+MAPS_DIR = Path(__file__).resolve().parent.parent / "src" / "maps"
+
+# Niveles con el borde abierto: el jugador está junto a celdas que no son ni pared ni piso
+@pytest.mark.parametrize("level_name, cost", [("level_15", 37), ("level_31", 17)])
+@pytest.mark.parametrize("engine", ["set", "bitboard"])
+def test_player_mode_open_border(level_name, cost, engine):
+    level = compile_level(MAPS_DIR / f"{level_name}.txt", use_cache=False, learn_patterns=False)
+    result = run_algorithm(level, engine, "player", "bfs", "N/A")
+    assert result["result"] == "Éxito"
+    assert result["cost"] == cost
+
+def test_push_mode_open_border_keeps_boxes_on_the_map():
+    # En level_15 la celda (1,6) está sobre un hueco del borde: la caja no se puede empujar hacia arriba
+    level = compile_level(MAPS_DIR / "level_15.txt", use_cache=False, learn_patterns=False)
+    sokoban_map = level.source
+    state = SokobanState((3, 6), {(1, 6)}, zobrist=sokoban_map.zobrist((3, 6), {(1, 6)}))
+    board_state = BitboardState(level, level.index((3, 6)), level.mask_of([(1, 6)]))
+    assert get_push_neighbors(state, sokoban_map, level.dead_squares) == []
+    assert get_bitboard_push_neighbors(board_state, level, level.dead_squares) == []
+
+def test_interior_floor_touching_row_zero(tmp_path):
+    # La celda (0,1) es piso interior: su vecino de arriba cae fuera del mapa
+    map_path = tmp_path / "row_zero.txt"
+    map_path.write_text("# ####\n# @$.#\n######\n")
+    reach = parse_map(map_path).reachability
+    assert reach.floor_mask == reach.mask_of([(0, 1), (1, 1), (1, 2), (1, 3), (1, 4)])
+
+# Cuarto de metas (1,7), (2,7..9), (1,9), (3,9) con puerta en (1,6), (2,6): con
+# cajas en (2,9) y (2,8) la tercera todavía puede entrar y llenar (2,7)
+GOAL_ROOM_MAP = """\
+###########
+#    #  # #
+#   $  ...#
+# #$   ## #
+#   $    ##
+#   #     #
+###       #
+#   #  @# #
+###########
+"""
+
+@pytest.mark.parametrize("engine", ["set", "bitboard"])
+def test_push_mode_goal_room_keeps_solvable_fills(tmp_path, engine):
+    map_path = tmp_path / "goal_room.txt"
+    map_path.write_text(GOAL_ROOM_MAP)
+    level = compile_level(map_path, use_cache=False, learn_patterns=False)
+    assert level.goal_room is not None
+    result = run_algorithm(level, engine, "push", "bfs", "N/A")
+    assert result["result"] == "Éxito"
+    assert result["cost"] == 16